@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import RoomType, Room, Price, Booking
+from .models import RoomType, Room, Price, Booking, Guest, RoomHold
+from .search import search_condition
 
 @admin.register(RoomType)
 class RoomTypeAdmin(admin.ModelAdmin):
@@ -20,6 +21,26 @@ class PriceAdmin(admin.ModelAdmin):
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ('customer_name', 'customer_phone', 'room', 'check_in_date', 'check_out_date', 'status')
-    list_filter = ('status', 'check_in_date', 'check_out_date')
+    list_filter = ('status', 'room_locked', 'check_in_date', 'check_out_date')
     search_fields = ('customer_name', 'customer_phone', 'room__room_number')
-    date_hierarchy = 'booking_date'
\ No newline at end of file
+    search_help_text = 'Начало имени или фамилии, начало телефона или номер комнаты'
+    date_hierarchy = 'booking_date'
+    # Выпадающий список из всех гостей в форме бронирования был бы огромным
+    raw_id_fields = ('guest',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по индексированным столбцам поиска вместо icontains по всей таблице
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(search_condition(search_term)), False
+
+@admin.register(Guest)
+class GuestAdmin(admin.ModelAdmin):
+    list_display = ('name', 'phone', 'email', 'created_at')
+    search_fields = ('=identity', 'name', 'email')
+    search_help_text = 'Имя, почта или точный идентификатор (phone:79991234567)'
+
+@admin.register(RoomHold)
+class RoomHoldAdmin(admin.ModelAdmin):
+    list_display = ('room', 'check_in_date', 'check_out_date', 'expires_at')
+    list_select_related = ('room__room_type',)
\ No newline at end of file
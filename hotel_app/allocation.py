@@ -0,0 +1,154 @@
+"""Подбор свободных номеров с учетом дат проживания"""
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .assignment import best_fit_room
+from .holds import active_holds
+from .models import Room, Booking
+
+
+class NoRoomAvailable(Exception):
+    """Нет свободного номера нужного типа на весь период проживания"""
+
+
+def active_bookings():
+    """Бронирования, которые занимают номер (не отмененные и не выселенные)"""
+    return Booking.objects.exclude(status__in=Booking.INACTIVE_STATUSES)
+
+
+def overlapping_bookings(check_in_date, check_out_date):
+    """Активные бронирования, пересекающиеся с периодом [check_in_date, check_out_date)"""
+    return active_bookings().filter(
+        check_in_date__lt=check_out_date,
+        check_out_date__gt=check_in_date,
+    )
+
+
+def occupied_on(on_date=None):
+    """Условие для бронирований, занимающих номер в указанную ночь.
+
+    Заселенный гость занимает номер до фактического выезда, даже если
+    плановая дата выезда уже прошла.
+    """
+    on_date = on_date or timezone.localdate()
+    return Q(status='checked_in') | Q(
+        check_in_date__lte=on_date,
+        check_out_date__gt=on_date,
+    )
+
+
+def occupies_on(booking, on_date=None):
+    """Условие occupied_on() для уже загруженного активного бронирования"""
+    on_date = on_date or timezone.localdate()
+    return booking.status == 'checked_in' or booking.check_in_date <= on_date < booking.check_out_date
+
+
+def is_room_occupied(room, on_date=None):
+    """Занят ли номер в указанную ночь (по умолчанию - сегодня)"""
+    return active_bookings().filter(occupied_on(on_date), room=room).exists()
+
+
+def overlapping_holds(check_in_date, check_out_date, hold_token=None):
+    """Непросроченные удержания, пересекающиеся с периодом, кроме удержаний владельца hold_token"""
+    holds = active_holds().filter(
+        check_in_date__lt=check_out_date,
+        check_out_date__gt=check_in_date,
+    )
+    if hold_token:
+        holds = holds.exclude(token=hold_token)
+    return holds
+
+
+def free_rooms(room_type, check_in_date, check_out_date, has_baby_bed=None, hold_token=None):
+    """Номера типа room_type, свободные на каждую ночь периода [check_in_date, check_out_date).
+
+    Источник истины - таблица бронирований, а не флаг Room.is_available:
+    проверка пересечений выполняется одним запросом NOT EXISTS по индексу
+    (room, check_in_date, check_out_date). Номера, удержанные другими
+    администраторами (см. holds), тоже не считаются свободными.
+    """
+    if check_out_date <= check_in_date:
+        return Room.objects.none()
+
+    busy = overlapping_bookings(check_in_date, check_out_date).filter(room=OuterRef('pk'))
+    held = overlapping_holds(check_in_date, check_out_date, hold_token).filter(room=OuterRef('pk'))
+    rooms = Room.objects.filter(room_type=room_type).filter(~Exists(busy), ~Exists(held))
+    if has_baby_bed is not None:
+        rooms = rooms.filter(has_baby_bed=has_baby_bed)
+    return rooms.order_by('room_number')
+
+
+def find_available_room(room_type, check_in_date, check_out_date, has_baby_bed=None, exclude=(),
+                        hold_token=None):
+    """Найти свободный номер на период одним запросом.
+
+    Сначала предлагаются номера с запрошенным значением has_baby_bed,
+    затем любые другие номера того же типа. Среди них выбирается номер,
+    в котором проживание плотнее всего примыкает к соседним бронированиям
+    (assignment.best_fit_room): так в календаре не остаются окна в одну
+    ночь, которые нельзя продать. Номера из exclude пропускаются.
+    """
+    rooms = free_rooms(room_type, check_in_date, check_out_date, hold_token=hold_token)
+    if exclude:
+        rooms = rooms.exclude(pk__in=exclude)
+    neighbours = active_bookings().filter(room=OuterRef('pk'))
+    rooms = rooms.annotate(
+        # Номер свободен на весь период, поэтому предыдущее бронирование -
+        # последнее с заездом раньше check_in_date (обход индекса по датам с конца)
+        previous_check_out=Subquery(
+            neighbours.filter(check_in_date__lt=check_in_date)
+            .order_by('-check_in_date').values('check_out_date')[:1]
+        ),
+        next_check_in=Subquery(
+            neighbours.filter(check_in_date__gte=check_out_date)
+            .order_by('check_in_date').values('check_in_date')[:1]
+        ),
+    )
+    return best_fit_room(rooms.select_related('room_type'), check_in_date, check_out_date, has_baby_bed)
+
+
+def lock_room(room_id):
+    """Заблокировать строку номера до конца текущей транзакции.
+
+    Пустой UPDATE берет блокировку строки в PostgreSQL, поэтому все, кто
+    бронирует этот номер, выполняют проверку по очереди. В SQLite
+    SELECT ... FOR UPDATE не поддерживается, а блокировку записи транзакция
+    берет уже при BEGIN IMMEDIATE (см. database).
+    Возвращает False, если номера больше нет.
+    """
+    return Room.objects.filter(pk=room_id).update(is_available=F('is_available')) == 1
+
+
+def claim_room(room_type, check_in_date, check_out_date, has_baby_bed=None, preferred_room_id=None,
+               max_attempts=5, hold_token=None):
+    """Закрепить за бронированием свободный номер; вызывать внутри transaction.atomic().
+
+    Номер сначала блокируется, а затем заново проверяется на пересечения,
+    поэтому после возврата и до конца транзакции никто другой не может
+    забронировать его на те же даты. Если предложенный номер уже занят,
+    выбирается следующий свободный номер того же типа. Удержания владельца
+    hold_token не мешают ему занять удержанный номер.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        raise transaction.TransactionManagementError('claim_room() требует транзакции')
+
+    tried = set()
+    room_id = preferred_room_id
+    for _ in range(max_attempts):
+        if room_id is None:
+            candidate = find_available_room(
+                room_type, check_in_date, check_out_date, has_baby_bed, exclude=tried, hold_token=hold_token
+            )
+            if candidate is None:
+                break
+            room_id = candidate.pk
+        tried.add(room_id)
+        if lock_room(room_id):
+            room = free_rooms(room_type, check_in_date, check_out_date, hold_token=hold_token).filter(
+                pk=room_id
+            ).select_related('room_type').first()
+            if room is not None:
+                return room
+        room_id = None
+    raise NoRoomAvailable('Нет доступных номеров выбранного типа')
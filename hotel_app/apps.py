@@ -3,4 +3,18 @@ from django.apps import AppConfig
 class HotelAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hotel_app'
-    verbose_name = 'Управление отелем'
\ No newline at end of file
+    verbose_name = 'Управление отелем'
+
+    def ready(self):
+        # Подключить обработчики сигналов
+        from . import signals  # noqa: F401
+
+        # Настройки SQLite и журнал медленных SQL-запросов для каждого нового соединения
+        from django.db.backends.signals import connection_created
+        from .database import apply_sqlite_pragmas, apply_sqlite_transaction_mode
+        from .log import install_slow_query_logger
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='hotel_app_sqlite_pragmas')
+        connection_created.connect(
+            apply_sqlite_transaction_mode, dispatch_uid='hotel_app_sqlite_transaction_mode'
+        )
+        connection_created.connect(install_slow_query_logger, dispatch_uid='hotel_app_slow_query_logger')
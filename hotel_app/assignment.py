@@ -0,0 +1,418 @@
+"""Распределение бронирований по номерам без дробления календаря.
+
+Если брать первый свободный номер по порядку, календарь со временем
+покрывается окнами в одну ночь между бронированиями: продать их нельзя,
+потому что короче HOTEL_MIN_STAY_NIGHTS никто не живет. Здесь задача
+рассматривается как упаковка интервалов на оси дат:
+
+* best_fit_room выбирает для нового проживания номер, в котором оно
+  плотнее всего примыкает к соседним бронированиям и не оставляет
+  непродаваемых окон (используется в allocation.find_available_room);
+* optimize_assignments заново раскладывает будущие бронирования типа
+  номера так, чтобы свободные ночи шли продаваемыми отрезками.
+
+Переставляются только бронирования в статусах pending и confirmed с
+заездом позже чем через HOTEL_ASSIGNMENT_LOCK_DAYS дней, выездом до конца
+горизонта и без флага room_locked; остальные бронирования и удержания номеров остаются на
+месте. Номер меняется только в пределах типа и наличия детской кроватки.
+
+Раскладка считается в памяти одним проходом по датам заезда (plan_rooms):
+проживание, которое оставило бы в своем номере непродаваемое окно,
+переходит в номер, освободившийся ближе всего к дате заезда, - так
+заполняются уже начатые отрезки, свободные дни остаются длинными, а
+остальные бронирования не трогаются. Номера хранятся в списке,
+отсортированном по дате освобождения, поэтому проход занимает O(n log n)
+плюс просмотр нескольких кандидатов на проживание: 1000 номеров на 365
+дней (около 70 тысяч бронирований) раскладываются примерно за секунду.
+"""
+import time
+from bisect import bisect_right, insort
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .holds import active_holds
+from .models import Booking, Room, RoomNight
+from .versioning import ROOM_STATUS, bump_version
+
+DEFAULT_MIN_STAY = 2
+DEFAULT_HORIZON_DAYS = 365
+DEFAULT_LOCK_DAYS = 1
+# Бронирования, которые можно переставить в другой номер
+MOVABLE_STATUSES = ('pending', 'confirmed')
+
+# Проживание в порядковых номерах дней (date.toordinal); room_id - текущий номер
+Stay = namedtuple('Stay', 'booking_id room_id check_in check_out')
+Fragmentation = namedtuple('Fragmentation', 'free_nights orphan_nights orphan_gaps')
+
+
+def min_stay_nights():
+    """Самое короткое продаваемое проживание: свободные отрезки короче не продать"""
+    return max(1, getattr(settings, 'HOTEL_MIN_STAY_NIGHTS', DEFAULT_MIN_STAY))
+
+
+def horizon_days():
+    return getattr(settings, 'HOTEL_ASSIGNMENT_HORIZON_DAYS', DEFAULT_HORIZON_DAYS)
+
+
+def lock_days():
+    """За сколько дней до заезда номер окончательно закрепляется за бронированием"""
+    return getattr(settings, 'HOTEL_ASSIGNMENT_LOCK_DAYS', DEFAULT_LOCK_DAYS)
+
+
+def fit_key(before, after, min_stay):
+    """Оценка размещения проживания, меньше - лучше.
+
+    before и after - свободные ночи, которые останутся до и после
+    проживания (after=None - дальше номер свободен). Сначала считаются
+    ночи в непродаваемых окнах, затем число новых окон и их длина.
+    """
+    orphans = before if 0 < before < min_stay else 0
+    fragments = int(before > 0)
+    leftover = before
+    if after is not None:
+        orphans += after if 0 < after < min_stay else 0
+        fragments += int(after > 0)
+        leftover += after
+    return orphans, fragments, leftover
+
+
+def best_fit_room(rooms, check_in_date, check_out_date, has_baby_bed=None, today=None):
+    """Номер из rooms, в котором проживание оставит меньше всего непродаваемых ночей.
+
+    rooms - свободные номера с аннотациями previous_check_out (выезд
+    предыдущего бронирования) и next_check_in (заезд следующего), как их
+    возвращает allocation.find_available_room. Номера с запрошенным
+    значением has_baby_bed предпочтительнее; при равной оценке выбирается
+    номер с меньшим номером комнаты.
+    """
+    today = today or timezone.localdate()
+    min_stay = min_stay_nights()
+
+    def key(room):
+        start = room.previous_check_out or min(today, check_in_date)
+        after = (room.next_check_in - check_out_date).days if room.next_check_in else None
+        mismatch = has_baby_bed is not None and room.has_baby_bed != has_baby_bed
+        return (mismatch, *fit_key((check_in_date - start).days, after, min_stay), room.room_number)
+
+    return min(rooms, key=key, default=None)
+
+
+def placement_key(intervals, next_index, before, check_out, min_stay):
+    """fit_key проживания в номере с закрепленными интервалами intervals; None - не помещается"""
+    after = None
+    if next_index < len(intervals):
+        after = intervals[next_index][0] - check_out
+        if after < 0:
+            return None
+    return fit_key(before, after, min_stay)
+
+
+def plan_rooms(room_ids, fixed, movable, start, min_stay=None):
+    """Раскладка переставляемых проживаний по номерам: {booking_id: room_id} или None.
+
+    fixed - (room_id, заезд, выезд) бронирований и удержаний, которые
+    остаются в своих номерах; movable - проживания Stay; даты - порядковые
+    номера дней, start - первый день календаря. Проживания обходятся по
+    дате заезда (при равной - сначала длинные). Проживание остается в
+    текущем номере, если тот свободен и в нем не останется непродаваемого
+    окна; иначе получает свободный номер с лучшей оценкой fit_key -
+    обычно освободившийся ближе всего к дате заезда. None - проход не смог
+    разместить какое-то проживание (такое возможно при закрепленных
+    бронированиях; тогда следует оставить исходную раскладку).
+    """
+    min_stay = min_stay or min_stay_nights()
+    fixed_by_room = {room_id: [] for room_id in room_ids}
+    for room_id, check_in, check_out in fixed:
+        fixed_by_room[room_id].append((check_in, check_out))
+    for intervals in fixed_by_room.values():
+        intervals.sort()
+
+    # Закрепленные интервалы обходятся вместе с проживаниями, чтобы номер
+    # освобождался после них; при равной дате заезда - раньше проживаний
+    events = [(check_in, 0, check_out, room_id) for room_id, check_in, check_out in fixed]
+    events.extend((stay.check_in, 1, stay.check_in - stay.check_out, stay) for stay in movable)
+    events.sort(key=lambda event: event[:3])
+
+    last_end = dict.fromkeys(room_ids, start)
+    next_fixed = dict.fromkeys(room_ids, 0)
+    # (день освобождения, номер) по возрастанию
+    released = sorted((start, room_id) for room_id in room_ids)
+    plan = {}
+
+    for check_in, kind, value, item in events:
+        if kind == 0:
+            room_id = item
+            released.remove((last_end[room_id], room_id))
+            last_end[room_id] = max(last_end[room_id], value)
+            next_fixed[room_id] += 1
+            insort(released, (last_end[room_id], room_id))
+            continue
+
+        stay = item
+        best = best_room = None
+        if last_end.get(stay.room_id, check_in + 1) <= check_in:
+            best = placement_key(fixed_by_room[stay.room_id], next_fixed[stay.room_id],
+                                 check_in - last_end[stay.room_id], stay.check_out, min_stay)
+            best_room = stay.room_id
+        if best is None or best[0]:
+            # Номера, свободные к дате заезда, от освободившегося последним
+            for index in range(bisect_right(released, (check_in, float('inf'))) - 1, -1, -1):
+                end, room_id = released[index]
+                before = check_in - end
+                # Остальные номера освободились раньше: их оценка не лучше этой границы
+                if best is not None and best <= fit_key(before, None, min_stay):
+                    break
+                key = placement_key(fixed_by_room[room_id], next_fixed[room_id], before, stay.check_out, min_stay)
+                if key is not None and (best is None or key < best):
+                    best, best_room = key, room_id
+        if best is None:
+            return None
+        room_id = best_room
+        released.remove((last_end[room_id], room_id))
+        last_end[room_id] = stay.check_out
+        insort(released, (stay.check_out, room_id))
+        plan[stay.booking_id] = room_id
+    return plan
+
+
+def fragmentation(intervals_by_room, start, end, min_stay=None):
+    """Свободные ночи календаря [start, end) и сколько из них в непродаваемых окнах.
+
+    intervals_by_room - {номер: [(заезд, выезд), ...]} в порядковых номерах
+    дней. Окно непродаваемо, если оно короче min_stay ночей и с обеих
+    сторон ограничено занятыми ночами или началом календаря; свободный
+    хвост до конца горизонта считается продаваемым.
+    """
+    min_stay = min_stay or min_stay_nights()
+    free = orphans = gaps = 0
+    for intervals in intervals_by_room.values():
+        cursor = start
+        for check_in, check_out in sorted(intervals):
+            check_in, check_out = max(check_in, start), min(check_out, end)
+            if check_out <= cursor:
+                continue
+            gap = check_in - cursor
+            if gap > 0:
+                free += gap
+                if gap < min_stay:
+                    orphans += gap
+                    gaps += 1
+            cursor = check_out
+        free += max(0, end - cursor)
+    return Fragmentation(free, orphans, gaps)
+
+
+class RoomClass:
+    """Взаимозаменяемые номера: один тип и одинаковое наличие детской кроватки"""
+
+    def __init__(self, room_type, has_baby_bed, room_ids):
+        self.room_type = room_type
+        self.has_baby_bed = has_baby_bed
+        self.room_ids = room_ids
+        self.bookings = 0
+        self.movable = 0
+        self.moved = 0
+        self.before = self.after = Fragmentation(0, 0, 0)
+        # planned, applied, unchanged, infeasible или conflict
+        self.outcome = 'unchanged'
+
+    def as_dict(self):
+        return {
+            'room_type': self.room_type.name,
+            'has_baby_bed': self.has_baby_bed,
+            'rooms': len(self.room_ids),
+            'bookings': self.bookings,
+            'movable': self.movable,
+            'moved': self.moved,
+            'orphan_nights_before': self.before.orphan_nights,
+            'orphan_nights_after': self.after.orphan_nights,
+            'sellable_nights_before': self.before.free_nights - self.before.orphan_nights,
+            'sellable_nights_after': self.after.free_nights - self.after.orphan_nights,
+            'outcome': self.outcome,
+        }
+
+
+class OptimizationResult:
+    """Итог одного запуска оптимизации распределения"""
+
+    def __init__(self, today, days, dry_run):
+        self.today = today
+        self.days = days
+        self.dry_run = dry_run
+        self.classes = []
+        self.elapsed_ms = 0.0
+        self.plan_ms = 0.0
+
+    def total(self, field):
+        return sum(getattr(room_class, field) for room_class in self.classes)
+
+    def fragmentation_total(self, name, field):
+        return sum(getattr(getattr(room_class, name), field) for room_class in self.classes)
+
+    @property
+    def moved(self):
+        return self.total('moved')
+
+    def summary(self):
+        """Одна строка для журнала запусков"""
+        before = self.fragmentation_total('before', 'orphan_nights')
+        after = self.fragmentation_total('after', 'orphan_nights')
+        action = 'будет переставлено' if self.dry_run else 'переставлено'
+        conflicts = sum(room_class.outcome == 'conflict' for room_class in self.classes)
+        text = (
+            f'Распределение на {self.days} дн. с {self.today:%d.%m.%Y}: бронирований {self.total("bookings")}, '
+            f'переставляемых {self.total("movable")}, {action} {self.moved}; '
+            f'непродаваемых ночей {before} -> {after}, {self.elapsed_ms:.1f} мс'
+        )
+        if conflicts:
+            text += f'; групп номеров изменено во время расчета: {conflicts} (запустите повторно)'
+        if self.dry_run:
+            text += ' (пробный запуск, ничего не изменено)'
+        return text
+
+    def as_dict(self):
+        return {
+            'date': self.today.isoformat(),
+            'days': self.days,
+            'dry_run': self.dry_run,
+            'moved': self.moved,
+            'orphan_nights_before': self.fragmentation_total('before', 'orphan_nights'),
+            'orphan_nights_after': self.fragmentation_total('after', 'orphan_nights'),
+            'elapsed_ms': self.elapsed_ms,
+            'plan_ms': self.plan_ms,
+            'classes': [room_class.as_dict() for room_class in self.classes],
+        }
+
+
+def room_classes(room_type=None):
+    """Группы взаимозаменяемых номеров (одним запросом)"""
+    rooms = Room.objects.select_related('room_type').order_by('room_type_id', 'has_baby_bed', 'id')
+    if room_type is not None:
+        rooms = rooms.filter(room_type=room_type)
+    classes = {}
+    for room in rooms.only('id', 'has_baby_bed', 'room_type'):
+        key = (room.room_type_id, room.has_baby_bed)
+        if key not in classes:
+            classes[key] = RoomClass(room.room_type, room.has_baby_bed, [])
+        classes[key].room_ids.append(room.pk)
+    return list(classes.values())
+
+
+def load_calendar(room_ids, today, end, now):
+    """Занятость номеров на [today, end): (бронирования, удержания) в виде кортежей.
+
+    Заселенный гость занимает номер до фактического выезда, поэтому его
+    бронирование читается и после плановой даты выезда.
+    """
+    bookings = list(
+        Booking.objects.exclude(status__in=Booking.INACTIVE_STATUSES).filter(
+            Q(check_out_date__gt=today) | Q(status='checked_in'),
+            room_id__in=room_ids,
+            check_in_date__lt=end,
+        ).order_by('id').values_list('id', 'room_id', 'check_in_date', 'check_out_date', 'status', 'room_locked')
+    )
+    holds = list(
+        active_holds(now).filter(room_id__in=room_ids, check_in_date__lt=end, check_out_date__gt=today)
+        .order_by('id').values_list('id', 'room_id', 'check_in_date', 'check_out_date')
+    )
+    return bookings, holds
+
+
+def plan_class(room_class, bookings, holds, today, end, first_movable):
+    """Рассчитать раскладку группы номеров; вернуть {booking_id: новый номер} для переставляемых"""
+    start = today.toordinal()
+    fixed, movable = [], []
+    for booking_id, room_id, check_in, check_out, status, room_locked in bookings:
+        check_in, check_out = check_in.toordinal(), check_out.toordinal()
+        # Проживание, выходящее за горизонт, не переставляется: бронирования
+        # других номеров после горизонта не читались, и оно могло бы на них наложиться
+        if (status in MOVABLE_STATUSES and not room_locked and check_in >= first_movable
+                and check_out <= end.toordinal()):
+            movable.append(Stay(booking_id, room_id, check_in, check_out))
+        else:
+            # Заселенный гость, задержавшийся после плановой даты, занимает и сегодняшнюю ночь
+            fixed.append((room_id, check_in, max(check_out, start + 1) if status == 'checked_in' else check_out))
+    fixed.extend((room_id, check_in.toordinal(), check_out.toordinal())
+                  for _, room_id, check_in, check_out in holds)
+    room_class.bookings = len(bookings)
+    room_class.movable = len(movable)
+
+    def calendar(assignment):
+        intervals = {room_id: [] for room_id in room_class.room_ids}
+        for room_id, check_in, check_out in fixed:
+            intervals[room_id].append((check_in, check_out))
+        for stay in movable:
+            intervals[assignment.get(stay.booking_id, stay.room_id)].append((stay.check_in, stay.check_out))
+        return fragmentation(intervals, start, end.toordinal())
+
+    room_class.before = room_class.after = calendar({})
+    if not movable:
+        return {}
+    plan = plan_rooms(room_class.room_ids, fixed, movable, start)
+    if plan is None:
+        room_class.outcome = 'infeasible'
+        return {}
+    after = calendar(plan)
+    if after.orphan_nights >= room_class.before.orphan_nights:
+        return {}
+    room_class.after = after
+    moves = {stay.booking_id: plan[stay.booking_id] for stay in movable if plan[stay.booking_id] != stay.room_id}
+    room_class.moved = len(moves)
+    room_class.outcome = 'planned'
+    return moves
+
+
+def apply_moves(moves):
+    """Записать новые номера бронирований и их проданных ночей (executemany, без сигналов)"""
+    params = [(room_id, booking_id) for booking_id, room_id in moves.items()]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'UPDATE {Booking._meta.db_table} SET room_id = %s WHERE id = %s', params)
+        # Номер меняется в пределах типа: room_type_id проданных ночей остается прежним
+        cursor.executemany(f'UPDATE {RoomNight._meta.db_table} SET room_id = %s WHERE booking_id = %s', params)
+
+
+def optimize_assignments(room_type=None, today=None, days=None, dry_run=False):
+    """Переставить будущие бронирования так, чтобы свободные ночи шли продаваемыми отрезками.
+
+    Каждая группа взаимозаменяемых номеров читается без блокировок и
+    раскладывается в памяти. Перед записью номера группы блокируются
+    (allocation.lock_room для всей группы одним UPDATE), а календарь
+    читается повторно: если за время расчета он изменился, группа
+    пропускается (outcome='conflict'), иначе перестановки записываются в
+    той же короткой транзакции. Раскладка применяется, только если
+    непродаваемых ночей становится меньше.
+    """
+    started = time.perf_counter()
+    today = today or timezone.localdate()
+    days = days or horizon_days()
+    end = today + timedelta(days=days)
+    first_movable = (today + timedelta(days=lock_days() + 1)).toordinal()
+    now = timezone.now()
+    result = OptimizationResult(today, days, dry_run)
+    plan_seconds = 0.0
+
+    for room_class in room_classes(room_type):
+        result.classes.append(room_class)
+        bookings, holds = load_calendar(room_class.room_ids, today, end, now)
+        plan_started = time.perf_counter()
+        moves = plan_class(room_class, bookings, holds, today, end, first_movable)
+        plan_seconds += time.perf_counter() - plan_started
+        if not moves or dry_run:
+            continue
+        with transaction.atomic():
+            Room.objects.filter(pk__in=room_class.room_ids).update(is_available=F('is_available'))
+            if load_calendar(room_class.room_ids, today, end, now) != (bookings, holds):
+                room_class.outcome = 'conflict'
+                continue
+            apply_moves(moves)
+            bump_version(ROOM_STATUS)
+        room_class.outcome = 'applied'
+
+    result.plan_ms = round(plan_seconds * 1000, 3)
+    result.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    return result
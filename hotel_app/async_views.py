@@ -0,0 +1,165 @@
+"""Асинхронные версии представлений только для чтения.
+
+Используются вместо одноименных представлений из views при запуске через
+ASGI (HOTEL_ASYNC_VIEWS, см. hotel_project/asgi.py): ожидание базы данных
+не занимает рабочий поток, поэтому один процесс обслуживает много
+одновременно открытых панелей. Контекст шаблонов тот же, что у
+синхронных версий; данные таблиц читаются заранее, а не лениво, потому
+что синхронный ORM недоступен во время отрисовки шаблона. Поэтому
+сначала проверяется кэш фрагментов (по той же версии данных, что и в
+синхронных версиях): при попадании готовая таблица передается в шаблон
+(cached_table), и ее строки не читаются.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed
+from django.shortcuts import render
+from django.utils import timezone
+
+from .allocation import active_bookings as active_bookings_query, occupies_on
+from .export import aexport_chunks, aiterate_rows, export_response, parse_export_params
+from .forms import BookingFilterForm
+from .models import Room
+from .occupancy import aoccupancy_counts
+from .pagination import KeysetPage
+from .reference_cache import reference_data
+from .versioning import REFERENCE, ROOM_STATUS, version_stamp
+from .views import (
+    BOOKING_PAGE_SIZE, booking_list_context, filtered_bookings, price_table_rows, room_management_rows,
+)
+
+logger = logging.getLogger(__name__)
+
+areference_data = sync_to_async(reference_data)
+
+
+async def adata_version():
+    """Метка версии номеров и бронирований для ключей кэша фрагментов"""
+    return await sync_to_async(version_stamp)(REFERENCE, ROOM_STATUS)
+
+
+async def acached_fragment(fragment_name, *vary_on):
+    """HTML фрагмента {% cache None fragment_name *vary_on using='fragments' %} или None, если его нет"""
+    return await caches['fragments'].aget(make_template_fragment_key(fragment_name, vary_on))
+
+
+async def arender(request, template_name, context):
+    """render() для асинхронного представления.
+
+    Сообщения могут храниться в сессии, а сессия читается из базы данных
+    синхронно, поэтому они загружаются заранее через sync_to_async.
+    """
+    await sync_to_async(len)(messages.get_messages(request))
+    return render(request, template_name, context)
+
+
+async def aget_room_status_info():
+    """Асинхронный вариант views.get_room_status_info() (те же два запроса)"""
+    try:
+        rooms = [
+            room async for room in Room.objects.select_related('room_type').order_by('room_number')
+        ]
+        # prefetch_related в асинхронном ORM Django 4.2 недоступен:
+        # активные бронирования читаются вторым запросом и раскладываются по номерам
+        bookings = {}
+        async for booking in active_bookings_query().order_by('check_in_date', 'id'):
+            bookings.setdefault(booking.room_id, []).append(booking)
+
+        room_status_info = []
+        today = timezone.localdate()
+        for room in rooms:
+            room.active_booking_list = bookings.get(room.pk, [])
+            room_status_info.append({
+                'room': room,
+                'is_occupied': any(occupies_on(booking, today) for booking in room.active_booking_list),
+                'active_bookings': room.active_booking_list
+            })
+        return room_status_info
+    except Exception:
+        logger.exception('Ошибка при получении информации о статусе комнат')
+        return []
+
+
+async def room_status(request):
+    """Room status view (async)"""
+    try:
+        data_version = await adata_version()
+        cached_table = await acached_fragment('room_status_table', data_version)
+        context = {
+            'room_status_info': [] if cached_table is not None else await aget_room_status_info(),
+            'cached_table': cached_table,
+            'data_version': data_version
+        }
+        return await arender(request, 'hotel_app/room_status.html', context)
+    except Exception as e:
+        messages.error(request, f'Ошибка при загрузке данных о номерах: {e}')
+        return await arender(request, 'hotel_app/room_status.html', {'room_status_info': []})
+
+
+async def room_management(request):
+    """Room management view (async)"""
+    try:
+        data = await areference_data()
+        context = {
+            'room_info': room_management_rows(data.room_types, await aoccupancy_counts())
+        }
+        return await arender(request, 'hotel_app/room_management.html', context)
+    except Exception as e:
+        messages.error(request, f'Ошибка при загрузке данных: {e}')
+        return await arender(request, 'hotel_app/room_management.html', {'room_info': []})
+
+
+async def booking_list(request):
+    """Booking list view (async)"""
+    try:
+        filter_form, bookings = filtered_bookings(request)
+        data_version = await adata_version()
+        cached_table = await acached_fragment('booking_list_table', data_version, request.get_full_path())
+        page = None
+        if cached_table is None:
+            page = await KeysetPage.acreate(
+                bookings,
+                BOOKING_PAGE_SIZE,
+                after=request.GET.get('after'),
+                before=request.GET.get('before'),
+            )
+        context = booking_list_context(request, filter_form, page)
+        context['cached_table'] = cached_table
+        context['data_version'] = data_version
+        return await arender(request, 'hotel_app/booking_list.html', context)
+    except Exception as e:
+        messages.error(request, f'Ошибка при загрузке бронирований: {e}')
+        return await arender(request, 'hotel_app/booking_list.html', {'bookings': [], 'filter_form': BookingFilterForm()})
+
+
+async def pricing_info(request):
+    """Pricing information view (async)"""
+    try:
+        data = await areference_data()
+        context = {
+            'price_dict': price_table_rows(data),
+            'data_version': data.version
+        }
+        return await arender(request, 'hotel_app/pricing_info.html', context)
+    except Exception as e:
+        messages.error(request, f'Ошибка при загрузке цен: {e}')
+        return await arender(request, 'hotel_app/pricing_info.html', {'price_dict': {}})
+
+
+async def export_bookings(request):
+    """Export bookings view (async).
+
+    Синхронный итератор StreamingHttpResponse под ASGI был бы прочитан
+    целиком перед отправкой, поэтому строки читаются асинхронно (aiterate_rows).
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        export_format, rows = parse_export_params(request.GET)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return export_response(export_format, aexport_chunks(export_format, aiterate_rows(rows)))
@@ -0,0 +1,434 @@
+"""Набор измерений производительности.
+
+Каждый набор (suite) - функция, которая возвращает словарь
+{имя_измерения: результат}. Результаты сохраняются в JSON, чтобы
+сравнивать прогоны между собой. Измерения изменяют данные (например,
+создают бронирования), поэтому запускать их следует на отдельной базе
+с синтетическими данными (команда generate_synthetic_data).
+"""
+import asyncio
+import json
+import platform
+import queue
+import statistics
+import threading
+import time
+import types
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.test import AsyncClient, Client, override_settings
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from .allocation import find_available_room
+from .assignment import Stay, fragmentation, lock_days, min_stay_nights, optimize_assignments, plan_rooms
+from .database import SQLITE_DEFAULT_PRAGMAS, SQLITE_DEFAULT_TRANSACTION_MODE, sqlite_pragmas
+from .models import Booking, Room, RoomType
+from .synthetic import SyntheticDataset
+
+
+def percentile(values, fraction):
+    """Перцентиль по методу ближайшего ранга"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies_ms, query_counts=None):
+    """Сводка по замерам: перцентили задержки в миллисекундах и число запросов к БД"""
+    result = {
+        'samples': len(latencies_ms),
+        'mean_ms': round(statistics.fmean(latencies_ms), 3) if latencies_ms else 0.0,
+        'p50_ms': round(percentile(latencies_ms, 0.50), 3),
+        'p90_ms': round(percentile(latencies_ms, 0.90), 3),
+        'p99_ms': round(percentile(latencies_ms, 0.99), 3),
+        'max_ms': round(max(latencies_ms), 3) if latencies_ms else 0.0,
+    }
+    if query_counts is not None:
+        result['queries'] = max(query_counts) if query_counts else 0
+    return result
+
+
+class QueryCounter:
+    """Счетчик SQL-запросов через connection.execute_wrapper.
+
+    В отличие от CaptureQueriesContext не ограничен размером журнала
+    connection.queries (9000 записей) и не хранит тексты запросов.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def timed(func):
+    """Выполнить func; вернуть (задержка в мс, число запросов к БД)"""
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+    return elapsed, counter.count
+
+
+def measure(func, iterations, warmup=1):
+    """Выполнить func iterations раз; вернуть сводку задержек и числа запросов"""
+    for _ in range(warmup):
+        func()
+    latencies, query_counts = [], []
+    for _ in range(iterations):
+        elapsed, queries = timed(func)
+        latencies.append(elapsed)
+        query_counts.append(queries)
+    return summarize(latencies, query_counts)
+
+
+def desk_client():
+    """Тестовый клиент с именем хоста, разрешенным настройками"""
+    return Client(HTTP_HOST='localhost')
+
+
+def checked(response, expected=(200, 302)):
+    if response.status_code not in expected:
+        # Запрос синхронного клиента - окружение WSGI, асинхронного - scope ASGI
+        path = response.request.get('PATH_INFO') or response.request.get('path')
+        raise RuntimeError(f'Неожиданный ответ {response.status_code} от {path}')
+    return response
+
+
+def view_suite(iterations=20):
+    """Задержка и число запросов основных страниц"""
+    client = desk_client()
+    room_type = RoomType.objects.order_by('id').first()
+    if room_type is None:
+        raise RuntimeError('Нет данных: сначала выполните generate_synthetic_data')
+
+    today = timezone.localdate()
+    offsets = iter(range(10 ** 6))
+
+    def check_in_form(offset):
+        check_in = today + timedelta(days=30 + offset % 300)
+        return {
+            'customer_name': 'Нагрузочный Тест',
+            'customer_phone': '+7(900)000-00-00',
+            'customer_email': 'bench@example.com',
+            'room_type': room_type.pk,
+            'check_in_date': check_in.isoformat(),
+            'check_out_date': (check_in + timedelta(days=3)).isoformat(),
+        }
+
+    def calculate():
+        checked(client.post(reverse('check_in_guest'), {**check_in_form(next(offsets)), 'calculate_price': '1'}))
+
+    def confirm():
+        checked(client.post(reverse('check_in_guest'), {'confirm_check_in': '1'}))
+
+    results = {}
+    for name in ('room_status', 'room_management', 'booking_list', 'check_in_out', 'pricing_info'):
+        url = reverse(name)
+        results[name] = measure(lambda: checked(client.get(url)), iterations)
+    results['check_in_guest_calculate'] = measure(calculate, iterations)
+
+    # Подтверждение измеряется отдельно: перед каждым замером нужен расчет стоимости
+    latencies, query_counts = [], []
+    for _ in range(iterations):
+        calculate()
+        elapsed, queries = timed(confirm)
+        latencies.append(elapsed)
+        query_counts.append(queries)
+    results['check_in_guest_confirm'] = summarize(latencies, query_counts)
+    return results
+
+
+WRITE_BENCHMARK_CUSTOMER = 'Нагрузочный тест записи'
+
+
+def write_worker(room_ids, transactions, start, latencies, errors):
+    """Поток администратора: создать бронирование и сменить его статус в одной транзакции"""
+    check_in = timezone.localdate() + timedelta(days=3000)
+    start.wait()
+    try:
+        for index in range(transactions):
+            started = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    booking = Booking.objects.create(
+                        customer_name=WRITE_BENCHMARK_CUSTOMER,
+                        customer_phone='+7(900)000-00-00',
+                        room_id=room_ids[index % len(room_ids)],
+                        check_in_date=check_in,
+                        check_out_date=check_in + timedelta(days=1),
+                        total_price=0,
+                    )
+                    Booking.objects.filter(pk=booking.pk).update(status='confirmed')
+            except OperationalError:
+                errors.append(1)
+            else:
+                latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        connection.close()
+
+
+def write_throughput(transactions, threads=4):
+    """Пропускная способность записи при threads одновременных писателях"""
+    room_ids = list(Room.objects.order_by('id').values_list('id', flat=True)[:threads])
+    if not room_ids:
+        raise RuntimeError('Нет данных: сначала выполните generate_synthetic_data')
+    # Соединение открывается заново, чтобы к нему применились текущие PRAGMA
+    connection.close()
+    connection.ensure_connection()
+
+    start = threading.Barrier(threads)
+    latencies, errors = [], []
+    workers = [
+        threading.Thread(target=write_worker, args=(room_ids, transactions, start, latencies, errors))
+        for _ in range(threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    Booking.objects.filter(customer_name=WRITE_BENCHMARK_CUSTOMER).delete()
+    result = summarize(latencies)
+    result['transactions_per_s'] = round(len(latencies) / elapsed, 1) if elapsed else 0.0
+    result['errors'] = len(errors)
+    return result
+
+
+def write_suite(iterations=20):
+    """Запись из нескольких потоков: настройки SQLite по умолчанию против профиля проекта"""
+    transactions = max(iterations, 50)
+    results = {}
+    if connection.vendor == 'sqlite':
+        with override_settings(
+            HOTEL_SQLITE_PRAGMAS=SQLITE_DEFAULT_PRAGMAS,
+            HOTEL_SQLITE_TRANSACTION_MODE=SQLITE_DEFAULT_TRANSACTION_MODE,
+        ):
+            results['sqlite_defaults'] = write_throughput(transactions)
+        results['configured'] = write_throughput(transactions)
+        results['configured']['pragmas'] = sqlite_pragmas()
+    else:
+        results['configured'] = write_throughput(transactions)
+    # Вернуть основному потоку соединение с настроенными PRAGMA
+    connection.close()
+    return results
+
+
+# Страницы, у которых есть асинхронные версии (hotel_app.async_views)
+READ_PAGES = ('room_status', 'room_management', 'booking_list', 'pricing_info')
+# Рабочих потоков у синхронного (WSGI) процесса
+WSGI_THREADS = 4
+
+
+def urlconf(asynchronous):
+    """Модуль маршрутов с синхронными или асинхронными представлениями чтения"""
+    from .urls import app_urlpatterns
+
+    module = types.ModuleType(f'hotel_app_benchmark_urls_{"async" if asynchronous else "sync"}')
+    module.urlpatterns = [path('', include(app_urlpatterns(asynchronous)))]
+    return module
+
+
+def wsgi_round(url, clients):
+    """clients одновременных запросов к процессу WSGI с WSGI_THREADS рабочими потоками"""
+    pending = queue.Queue()
+    for _ in range(clients):
+        pending.put(time.perf_counter())
+    latencies = []
+
+    def worker():
+        client = desk_client()
+        try:
+            while True:
+                try:
+                    queued_at = pending.get_nowait()
+                except queue.Empty:
+                    return
+                checked(client.get(url))
+                # Задержка включает ожидание свободного потока
+                latencies.append((time.perf_counter() - queued_at) * 1000)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(WSGI_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+async def asgi_round(url, clients):
+    """clients одновременных запросов к процессу ASGI (одна очередь событий)"""
+    # AsyncClient в Django 4.2 всегда отправляет Host: testserver и не берет
+    # заголовки из конструктора; имя разрешено в concurrency_suite
+    client = AsyncClient()
+
+    async def one():
+        started = time.perf_counter()
+        response = await client.get(url)
+        checked(response)
+        return (time.perf_counter() - started) * 1000
+
+    return list(await asyncio.gather(*(one() for _ in range(clients))))
+
+
+def concurrency_suite(iterations=20, clients=50):
+    """Одновременные открытия панелей: WSGI с пулом потоков против ASGI с асинхронными представлениями"""
+    results = {}
+    for mode, asynchronous in (('wsgi', False), ('asgi', True)):
+        hosts = [*settings.ALLOWED_HOSTS, 'localhost', 'testserver']
+        with override_settings(ROOT_URLCONF=urlconf(asynchronous), ALLOWED_HOSTS=hosts):
+            for name in READ_PAGES:
+                url = reverse(name)
+                latencies = []
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    if asynchronous:
+                        latencies.extend(asyncio.run(asgi_round(url, clients)))
+                    else:
+                        latencies.extend(wsgi_round(url, clients))
+                elapsed = time.perf_counter() - started
+                result = summarize(latencies)
+                result['requests_per_s'] = round(len(latencies) / elapsed, 1) if elapsed else 0.0
+                result['clients'] = clients
+                results[f'{mode}.{name}'] = result
+    return results
+
+
+def synthetic_calendar(rooms=1000, days=365, seed=42):
+    """Будущие бронирования rooms взаимозаменяемых номеров на days дней в памяти.
+
+    Периоды проживания строятся так же, как в generate_synthetic_data:
+    номера заполнялись по очереди без подбора, поэтому календарь дробленый.
+    Возвращает (номера, проживания Stay, первый день, день после последнего).
+    """
+    dataset = SyntheticDataset(rooms=rooms, seed=seed)
+    start = dataset.today
+    first_movable = start + timedelta(days=lock_days() + 1)
+    stays = []
+    for room_id in range(rooms):
+        for check_in, check_out in dataset.stays(first_movable, start + timedelta(days=days)):
+            stays.append(Stay(len(stays) + 1, room_id, check_in.toordinal(), check_out.toordinal()))
+    return list(range(rooms)), stays, start.toordinal(), (start + timedelta(days=days)).toordinal()
+
+
+def calendar_fragmentation(room_ids, stays, start, end, plan=None):
+    intervals = {room_id: [] for room_id in room_ids}
+    for stay in stays:
+        intervals[(plan or {}).get(stay.booking_id, stay.room_id)].append((stay.check_in, stay.check_out))
+    return fragmentation(intervals, start, end)
+
+
+def assignment_suite(iterations=20, rooms=1000, days=365):
+    """Оптимизатор распределения: раскладка 1000 номеров на 365 дней в памяти и на синтетических данных"""
+    results = {}
+    # Раскладка занимает порядка секунды: достаточно нескольких замеров
+    runs = max(1, min(iterations, 5))
+
+    room_ids, stays, start, end = synthetic_calendar(rooms, days)
+    plans = []
+    result = measure(lambda: plans.append(plan_rooms(room_ids, [], stays, start)), runs, warmup=0)
+    before = calendar_fragmentation(room_ids, stays, start, end)
+    after = calendar_fragmentation(room_ids, stays, start, end, plans[-1])
+    results[f'plan_{rooms}x{days}'] = {
+        **result,
+        'bookings': len(stays),
+        'moved': sum(plans[-1][stay.booking_id] != stay.room_id for stay in stays),
+        'orphan_nights_before': before.orphan_nights,
+        'orphan_nights_after': after.orphan_nights,
+        'min_stay': min_stay_nights(),
+    }
+
+    room_type = RoomType.objects.order_by('id').first()
+    if room_type is None:
+        raise RuntimeError('Нет данных: сначала выполните generate_synthetic_data')
+    # Пробный запуск читает календарь из базы данных, но ничего не меняет
+    optimized = []
+    result = measure(lambda: optimized.append(optimize_assignments(days=days, dry_run=True)), runs, warmup=0)
+    results['optimize_dry_run'] = {
+        **result,
+        'bookings': optimized[-1].total('bookings'),
+        'moved': optimized[-1].moved,
+        'orphan_nights_before': optimized[-1].fragmentation_total('before', 'orphan_nights'),
+        'orphan_nights_after': optimized[-1].fragmentation_total('after', 'orphan_nights'),
+        'plan_ms': optimized[-1].plan_ms,
+    }
+
+    today = timezone.localdate()
+    offsets = iter(range(10 ** 6))
+
+    def find():
+        check_in = today + timedelta(days=7 + next(offsets) % 300)
+        find_available_room(room_type, check_in, check_in + timedelta(days=3), has_baby_bed=True)
+
+    results['find_available_room'] = measure(find, iterations)
+    return results
+
+
+SUITES = {
+    'views': view_suite,
+    'writes': write_suite,
+    'concurrency': concurrency_suite,
+    'assignment': assignment_suite,
+}
+
+
+def dataset_summary():
+    return {
+        'rooms': Room.objects.count(),
+        'room_types': RoomType.objects.count(),
+        'bookings': Booking.objects.count(),
+    }
+
+
+def run_suites(names, iterations):
+    """Выполнить наборы измерений и вернуть отчет для сохранения в JSON"""
+    report = {
+        'started_at': timezone.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+        },
+        'dataset': dataset_summary(),
+        'iterations': iterations,
+        'suites': {},
+    }
+    for name in names:
+        report['suites'][name] = SUITES[name](iterations=iterations)
+    return report
+
+
+def compare_reports(baseline, current):
+    """Изменение p50 и числа запросов относительно предыдущего отчета"""
+    rows = []
+    for suite, results in current['suites'].items():
+        for name, result in results.items():
+            before = baseline.get('suites', {}).get(suite, {}).get(name)
+            if not before or 'p50_ms' not in result or 'p50_ms' not in before:
+                continue
+            change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+            rows.append((suite, name, before['p50_ms'], result['p50_ms'], change,
+                         before.get('queries'), result.get('queries')))
+    return rows
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
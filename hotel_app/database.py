@@ -0,0 +1,68 @@
+"""Настройка соединений с базой данных.
+
+Транзакции записи в SQLite начинаются с BEGIN IMMEDIATE
+(HOTEL_SQLITE_TRANSACTION_MODE). Django 4.2 начинает транзакцию
+atomic() с BEGIN DEFERRED: блокировка записи берется только на первой
+записи, и если транзакция перед этим уже читала, а другое соединение
+успело записать, SQLite в режиме WAL не ждет busy_timeout, а сразу
+возвращает SQLITE_BUSY (снимок чтения устарел). BEGIN IMMEDIATE берет
+блокировку записи в начале транзакции, где busy_timeout действует,
+поэтому код внутри atomic() может читать перед записью в любом порядке.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Значения по умолчанию SQLite и Django (тайм-аут sqlite3.connect - 5 секунд);
+# используются как точка отсчета в измерениях производительности записи
+SQLITE_DEFAULT_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 5000,
+}
+SQLITE_DEFAULT_TRANSACTION_MODE = 'DEFERRED'
+SQLITE_TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def sqlite_pragmas():
+    """PRAGMA для новых соединений SQLite: {имя: значение}"""
+    return getattr(settings, 'HOTEL_SQLITE_PRAGMAS', {})
+
+
+def sqlite_transaction_mode():
+    """Режим BEGIN для транзакций atomic() в SQLite: DEFERRED, IMMEDIATE или EXCLUSIVE"""
+    mode = getattr(settings, 'HOTEL_SQLITE_TRANSACTION_MODE', SQLITE_DEFAULT_TRANSACTION_MODE).upper()
+    if mode not in SQLITE_TRANSACTION_MODES:
+        raise ImproperlyConfigured(f'Неизвестный HOTEL_SQLITE_TRANSACTION_MODE: {mode!r}')
+    return mode
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Выполнить HOTEL_SQLITE_PRAGMAS на новом соединении SQLite (сигнал connection_created)"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = sqlite_pragmas()
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def apply_sqlite_transaction_mode(sender, connection, **kwargs):
+    """Начинать транзакции нового соединения SQLite с BEGIN <режим> (сигнал connection_created).
+
+    В Django 4.2 у SQLite нет параметра OPTIONS['transaction_mode'] (он
+    появился в 5.1), поэтому заменяется метод соединения, которым atomic()
+    начинает транзакцию.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    mode = sqlite_transaction_mode()
+    if mode == SQLITE_DEFAULT_TRANSACTION_MODE:
+        return
+    begin = f'BEGIN {mode}'
+
+    def start_transaction_under_autocommit():
+        connection.cursor().execute(begin)
+
+    connection._start_transaction_under_autocommit = start_transaction_under_autocommit
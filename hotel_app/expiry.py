@@ -0,0 +1,118 @@
+"""Просрочка бронирований, по которым гость не приехал.
+
+Бронирование в статусе pending или confirmed с прошедшей датой заезда
+иначе оставалось бы активным до плановой даты выезда: номер считался бы
+занятым (update_room_availability, сверка статуса номеров), а его ночи -
+проданными. Если дата заезда прошла больше чем на
+HOTEL_BOOKING_EXPIRY_DAYS[статус] дней, бронирование переводится в статус
+expired, а номер и ночи освобождаются.
+
+Кандидаты находятся одним запросом по индексам статуса без блокировки
+записи. Статусы меняются
+пакетами через frontdesk.batch_transition, каждый пакет - в своей короткой
+транзакции, поэтому стойка регистрации ждет не дольше одного пакета.
+UPDATE с условием на исходный статус пропускает бронирования, по которым
+гость успел заселиться между поиском и обработкой.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .allocation import active_bookings
+from .frontdesk import MAX_BATCH_SIZE, TRANSITIONS, batch_transition
+
+DEFAULT_EXPIRY_DAYS = {'pending': 0, 'confirmed': 1}
+DEFAULT_BATCH_SIZE = 200
+
+
+def expiry_days():
+    """Сколько дней после даты заезда ждать гостя: {статус: дней}"""
+    return getattr(settings, 'HOTEL_BOOKING_EXPIRY_DAYS', DEFAULT_EXPIRY_DAYS)
+
+
+def expiry_batch_size():
+    return getattr(settings, 'HOTEL_BOOKING_EXPIRY_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+
+def stale_bookings(today=None, policy=None):
+    """Бронирования, срок ожидания гостя по которым истек к дню today"""
+    today = today or timezone.localdate()
+    policy = expiry_days() if policy is None else policy
+    unknown = set(policy) - set(TRANSITIONS['expire'].allowed_from)
+    if unknown:
+        raise ValueError(f'Просрочка не применяется к статусам: {", ".join(sorted(unknown))}')
+    if not policy:
+        return active_bookings().none()
+
+    condition = Q()
+    for status, days in policy.items():
+        condition |= Q(status=status, check_in_date__lt=today - timedelta(days=days))
+    # Общая граница по дате заезда позволяет базе данных выбрать и индекс по датам
+    latest = today - timedelta(days=min(policy.values()))
+    return active_bookings().filter(condition, check_in_date__lt=latest)
+
+
+class SweepResult:
+    """Итог одного запуска просрочки"""
+
+    def __init__(self, today, dry_run):
+        self.today = today
+        self.dry_run = dry_run
+        self.found = 0
+        self.expired = 0
+        self.skipped = 0
+        self.rooms_freed = 0
+        self.batches = 0
+        self.elapsed_ms = 0.0
+
+    def summary(self):
+        """Одна строка для журнала запусков"""
+        if self.dry_run:
+            return f'Просрочка на {self.today:%d.%m.%Y}: найдено {self.found} (пробный запуск, ничего не изменено)'
+        return (
+            f'Просрочка на {self.today:%d.%m.%Y}: найдено {self.found}, просрочено {self.expired}, '
+            f'пропущено {self.skipped}, освобождено номеров {self.rooms_freed}, '
+            f'пакетов {self.batches}, {self.elapsed_ms:.1f} мс'
+        )
+
+    def as_dict(self):
+        return {
+            'date': self.today.isoformat(),
+            'dry_run': self.dry_run,
+            'found': self.found,
+            'expired': self.expired,
+            'skipped': self.skipped,
+            'rooms_freed': self.rooms_freed,
+            'batches': self.batches,
+            'elapsed_ms': self.elapsed_ms,
+        }
+
+
+def sweep_stale_bookings(today=None, batch_size=None, pause=0, dry_run=False):
+    """Перевести просроченные бронирования в статус expired пакетами по batch_size.
+
+    Между пакетами выполняется пауза pause секунд, чтобы другие запросы
+    на запись успели получить блокировку.
+    """
+    started = time.perf_counter()
+    today = today or timezone.localdate()
+    result = SweepResult(today, dry_run)
+    ids = list(stale_bookings(today).order_by('check_in_date', 'id').values_list('id', flat=True))
+    result.found = len(ids)
+
+    if not dry_run:
+        size = max(1, min(batch_size or expiry_batch_size(), MAX_BATCH_SIZE))
+        for start in range(0, len(ids), size):
+            if start and pause:
+                time.sleep(pause)
+            batch = batch_transition('expire', ids[start:start + size])
+            result.batches += 1
+            result.expired += len(batch.done)
+            result.skipped += len(batch.skipped)
+            result.rooms_freed += len(batch.rooms_changed)
+
+    result.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    return result
@@ -0,0 +1,172 @@
+"""Потоковая выгрузка бронирований в CSV и NDJSON.
+
+Строки читаются через values_list(...).iterator(chunk_size) одним
+запросом с JOIN номера и типа номера, без создания объектов моделей, и
+сразу отдаются клиенту (StreamingHttpResponse) или пишутся в файл
+(команда export_bookings) кусками по EXPORT_BUFFER_SIZE символов, поэтому
+расход памяти не зависит от количества бронирований.
+"""
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .forms import BookingFilterForm
+from .models import Booking
+
+# Колонки выгрузки: (заголовок, поле для values_list)
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('booking_date', 'booking_date'),
+    ('customer_name', 'customer_name'),
+    ('customer_phone', 'customer_phone'),
+    ('room_number', 'room__room_number'),
+    ('room_type', 'room__room_type__name'),
+    ('check_in_date', 'check_in_date'),
+    ('check_out_date', 'check_out_date'),
+    ('status', 'status'),
+    ('actual_check_in_date', 'actual_check_in_date'),
+    ('actual_check_out_date', 'actual_check_out_date'),
+    ('total_price', 'total_price'),
+)
+EXPORT_HEADERS = tuple(header for header, field in EXPORT_COLUMNS)
+# Строк в одном запросе к базе данных (fetchmany или серверный курсор)
+EXPORT_CHUNK_SIZE = 2000
+# Примерный размер одного куска ответа в символах
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+
+def plain_value(value):
+    """Значение колонки в виде JSON-совместимого скаляра"""
+    if value is None or isinstance(value, (int, str)):
+        return value
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    # date и Decimal
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class EchoBuffer:
+    """Файлоподобный объект для csv.writer: writerow() возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+class CsvFormat:
+    """CSV с заголовком, разделитель - запятая"""
+    content_type = 'text/csv; charset=utf-8'
+    extension = 'csv'
+
+    def __init__(self):
+        self.writer = csv.writer(EchoBuffer())
+
+    def header(self):
+        # BOM, чтобы Excel распознал UTF-8
+        return '\ufeff' + self.writer.writerow(EXPORT_HEADERS)
+
+    def row(self, values):
+        return self.writer.writerow(['' if value is None else plain_value(value) for value in values])
+
+
+class NdjsonFormat:
+    """Один JSON-объект на строку, без заголовка"""
+    content_type = 'application/x-ndjson; charset=utf-8'
+    extension = 'ndjson'
+
+    def header(self):
+        return ''
+
+    def row(self, values):
+        return json.dumps(
+            dict(zip(EXPORT_HEADERS, map(plain_value, values))), ensure_ascii=False, separators=(',', ':')
+        ) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': CsvFormat,
+    'ndjson': NdjsonFormat,
+}
+
+
+def export_queryset(filter_form=None):
+    """Строки выгрузки (кортежи в порядке EXPORT_COLUMNS) по возрастанию id"""
+    bookings = Booking.objects.all()
+    if filter_form is not None and filter_form.is_bound:
+        bookings = filter_form.filter(bookings)
+    return bookings.values_list(*(field for header, field in EXPORT_COLUMNS)).order_by('id')
+
+
+def parse_export_params(params):
+    """Формат и строки выгрузки из параметров запроса (format, фильтры BookingFilterForm).
+
+    Неизвестный формат или неверные фильтры вызывают ValueError.
+    """
+    name = params.get('format') or 'csv'
+    if name not in EXPORT_FORMATS:
+        raise ValueError(f'Неизвестный формат выгрузки: {name}')
+    filter_form = BookingFilterForm(params)
+    if not filter_form.is_valid():
+        raise ValueError('; '.join(f'{field}: {" ".join(errors)}' for field, errors in filter_form.errors.items()))
+    return EXPORT_FORMATS[name](), export_queryset(filter_form)
+
+
+def export_chunks(export_format, rows):
+    """Текст выгрузки кусками примерно по EXPORT_BUFFER_SIZE символов"""
+    buffer, size = [export_format.header()], 0
+    for values in rows:
+        line = export_format.row(values)
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def take(iterator, count):
+    return list(islice(iterator, count))
+
+
+async def aiterate_rows(rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """Асинхронный обход строк queryset кусками по chunk_size.
+
+    QuerySet.aiterator() в Django 4.2 для values_list выполняет запрос
+    прямо в асинхронном контексте (SynchronousOnlyOperation), поэтому
+    синхронный iterator() читается через sync_to_async в потоке соединения.
+    """
+    iterator = rows.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = await sync_to_async(take)(iterator, chunk_size)
+        if not chunk:
+            return
+        for values in chunk:
+            yield values
+
+
+async def aexport_chunks(export_format, rows):
+    """Асинхронный вариант export_chunks() для асинхронного итератора строк"""
+    buffer, size = [export_format.header()], 0
+    async for values in rows:
+        line = export_format.row(values)
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def export_response(export_format, chunks):
+    """Потоковый ответ с выгрузкой в виде вложения"""
+    response = StreamingHttpResponse(chunks, content_type=export_format.content_type)
+    filename = f'bookings-{timezone.localtime():%Y%m%d-%H%M%S}.{export_format.extension}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    return response
@@ -106,3 +106,41 @@ class CheckInForm(forms.Form):
         widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control', 'lang': 'ru'}),
         initial=lambda: date.today()
     )
+
+class BookingFilterForm(forms.Form):
+    """Форма фильтров списка бронирований"""
+    status = forms.ChoiceField(
+        label='Статус',
+        required=False,
+        choices=[('', 'Все статусы')] + Booking.STATUS_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    date_from = forms.DateField(
+        label='Проживание с',
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control', 'lang': 'ru'})
+    )
+    date_to = forms.DateField(
+        label='Проживание по',
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control', 'lang': 'ru'})
+    )
+    room = forms.CharField(
+        label='Номер комнаты',
+        required=False,
+        max_length=10,
+        widget=forms.TextInput(attrs={'class': 'form-control'})
+    )
+    
+    def filter(self, queryset):
+        """Применить заполненные фильтры к queryset бронирований"""
+        data = self.cleaned_data
+        if data.get('status'):
+            queryset = queryset.filter(status=data['status'])
+        if data.get('date_from'):
+            queryset = queryset.filter(check_out_date__gt=data['date_from'])
+        if data.get('date_to'):
+            queryset = queryset.filter(check_in_date__lte=data['date_to'])
+        if data.get('room'):
+            queryset = queryset.filter(room__room_number=data['room'].strip())
+        return queryset
@@ -0,0 +1,141 @@
+"""Пакетные операции стойки регистрации: заезд, выезд и отмена многих бронирований.
+
+Пакет обрабатывается в одной транзакции фиксированным числом запросов,
+не зависящим от количества бронирований: статусы меняются одним UPDATE
+с условием на допустимый исходный статус, журнал проданных ночей
+правится одним DELETE, а доступность всех затронутых номеров
+пересчитывается одним запросом (reconciliation.refresh_availability).
+UPDATE не отправляет сигналы, поэтому версия ROOM_STATUS увеличивается
+здесь же.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .ledger import RELEASED_STATUSES
+from .models import Booking, RoomNight
+from .reconciliation import refresh_availability
+from .versioning import ROOM_STATUS, bump_version
+
+# Не больше стольких бронирований в одном пакете (размер списков IN в запросах)
+MAX_BATCH_SIZE = 1000
+
+# due_field - поле даты, которая должна наступить (не позже сегодняшней), или None
+Transition = namedtuple('Transition', 'allowed_from status timestamp_field due_field label')
+
+TRANSITIONS = {
+    'check_in': Transition(('pending', 'confirmed'), 'checked_in', 'actual_check_in_date', 'check_in_date', 'Заезд'),
+    'check_out': Transition(('checked_in',), 'checked_out', 'actual_check_out_date', None, 'Выезд'),
+    'cancel': Transition(('pending', 'confirmed'), 'cancelled', None, None, 'Отмена'),
+    # Гость не приехал (expiry.sweep_stale_bookings)
+    'expire': Transition(('pending', 'confirmed'), 'expired', None, None, 'Просрочено'),
+}
+
+# Итоги по отдельным бронированиям
+DONE = 'done'
+NOT_FOUND = 'not_found'
+INVALID_STATUS = 'invalid_status'
+NOT_DUE = 'not_due'
+
+BatchOutcome = namedtuple('BatchOutcome', 'booking_id outcome status')
+
+
+class BatchResult:
+    """Итог пакетной операции по каждому бронированию и изменившиеся номера"""
+
+    def __init__(self, action):
+        self.action = action
+        self.outcomes = []
+        self.rooms_changed = []
+
+    @property
+    def done(self):
+        return [item.booking_id for item in self.outcomes if item.outcome == DONE]
+
+    @property
+    def skipped(self):
+        return [item for item in self.outcomes if item.outcome != DONE]
+
+    def as_dict(self):
+        return {
+            'action': self.action,
+            'done': len(self.done),
+            'skipped': len(self.skipped),
+            'outcomes': [item._asdict() for item in self.outcomes],
+            'rooms_changed': [
+                {'room_id': room.pk, 'room_number': room.room_number, 'is_available': room.is_available}
+                for room in self.rooms_changed
+            ],
+        }
+
+
+def lock_bookings(booking_ids):
+    """Заблокировать строки бронирований до конца транзакции (пустой UPDATE, как allocation.lock_room)"""
+    Booking.objects.filter(pk__in=booking_ids).update(status=F('status'))
+
+
+def batch_transition(action, booking_ids, now=None):
+    """Перевести бронирования booking_ids в статус действия action (ключ TRANSITIONS).
+
+    Бронирования в недопустимом исходном статусе, несуществующие и те,
+    у которых дата transition.due_field еще не наступила (заезд раньше
+    срока), пропускаются; итог по каждому возвращается в BatchResult
+    в порядке booking_ids.
+    """
+    transition = TRANSITIONS[action]
+    booking_ids = list(dict.fromkeys(booking_ids))
+    if len(booking_ids) > MAX_BATCH_SIZE:
+        raise ValueError(f'В одном пакете не больше {MAX_BATCH_SIZE} бронирований')
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    due_filter = {f'{transition.due_field}__lte': today} if transition.due_field else {}
+    result = BatchResult(action)
+
+    with transaction.atomic():
+        lock_bookings(booking_ids)
+        # {id: (статус, номер[, дата due_field])}
+        fields = ('id', 'status', 'room_id') + ((transition.due_field,) if transition.due_field else ())
+        current = {row[0]: row[1:] for row in Booking.objects.filter(pk__in=booking_ids).values_list(*fields)}
+        allowed = [
+            booking_id for booking_id in booking_ids
+            if booking_id in current and current[booking_id][0] in transition.allowed_from
+        ]
+        not_due = {
+            booking_id for booking_id in allowed
+            if transition.due_field and current[booking_id][2] > today
+        }
+        eligible = [booking_id for booking_id in allowed if booking_id not in not_due]
+
+        if eligible:
+            changes = {'status': transition.status}
+            if transition.timestamp_field:
+                changes[transition.timestamp_field] = now
+            Booking.objects.filter(pk__in=eligible, status__in=transition.allowed_from, **due_filter).update(**changes)
+
+            # Журнал проданных ночей: как ledger.stay_end для отдельного бронирования
+            if transition.status in RELEASED_STATUSES:
+                RoomNight.objects.filter(booking_id__in=eligible).delete()
+            elif action == 'check_out':
+                RoomNight.objects.filter(booking_id__in=eligible, night__gte=today).delete()
+
+            result.rooms_changed = refresh_availability({current[booking_id][1] for booking_id in eligible})
+            bump_version(ROOM_STATUS)
+
+    done = set(eligible)
+    for booking_id in booking_ids:
+        if booking_id in done:
+            result.outcomes.append(BatchOutcome(booking_id, DONE, transition.status))
+        elif booking_id in not_due:
+            result.outcomes.append(BatchOutcome(booking_id, NOT_DUE, current[booking_id][0]))
+        elif booking_id in current:
+            result.outcomes.append(BatchOutcome(booking_id, INVALID_STATUS, current[booking_id][0]))
+        else:
+            result.outcomes.append(BatchOutcome(booking_id, NOT_FOUND, None))
+    return result
+
+
+def due_departures(on_date=None):
+    """Заселенные бронирования с плановым выездом не позже on_date (по умолчанию сегодня)"""
+    return Booking.objects.filter(status='checked_in', check_out_date__lte=on_date or timezone.localdate())
@@ -0,0 +1,134 @@
+"""Профили гостей.
+
+Бронирование хранит имя, телефон и почту гостя строками в том виде, в
+каком их ввели. Профиль Guest объединяет бронирования одного человека по
+нормализованному идентификатору: цифрам телефона (как в search), а если
+в телефоне нет цифр - почте в нижнем регистре. Бронирование без телефона
+и почты остается без профиля: по одному имени разных людей не различить.
+История гостя и сумма его бронирований читаются по внешнему ключу
+Booking.guest с индексом, без сравнения строк по всей таблице бронирований.
+
+Новые бронирования привязываются к профилю при сохранении (signals).
+Бронирования, созданные до появления профилей или через bulk_create,
+привязывает backfill_guests (команда backfill_guests).
+"""
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+
+from .ledger import RELEASED_STATUSES
+from .models import Booking, Guest
+from .search import normalize_phone
+
+BATCH_SIZE = 5000
+
+
+def identity_key(phone, email=''):
+    """Нормализованный идентификатор гостя: 'phone:<цифры>', 'email:<почта>' или None"""
+    digits = normalize_phone(phone)
+    if digits:
+        return f'phone:{digits}'
+    email = (email or '').strip().lower()
+    if email:
+        return f'email:{email}'
+    return None
+
+
+def resolve_guest(name, phone, email=''):
+    """Профиль гостя с такими телефоном или почтой; создается, если его еще нет.
+
+    None - у гостя нет ни телефона, ни почты.
+    """
+    identity = identity_key(phone, email)
+    if identity is None:
+        return None
+    guest, created = Guest.objects.get_or_create(
+        identity=identity, defaults={'name': name, 'phone': phone, 'email': email or ''}
+    )
+    if not created and email and not guest.email:
+        guest.email = email
+        guest.save(update_fields=['email'])
+    return guest
+
+
+def attach_guest(booking):
+    """Привязать бронирование к профилю гостя, если он еще не задан"""
+    if booking.guest_id is None:
+        booking.guest = resolve_guest(booking.customer_name, booking.customer_phone, booking.customer_email)
+    return booking
+
+
+def backfill_guests(batch_size=BATCH_SIZE, progress=None):
+    """Привязать к профилям бронирования без гостя; вернуть (привязано бронирований, создано гостей).
+
+    Бронирования читаются пачками по возрастанию id (только нужные поля),
+    каждая пачка обрабатывается в своей короткой транзакции фиксированным
+    числом запросов: чтение существующих профилей пачки, bulk_create
+    недостающих и один executemany UPDATE для привязки. Бронирования без
+    телефона и почты пропускаются. Повторный запуск продолжает с
+    непривязанных бронирований.
+    """
+    linked = created = 0
+    last_id = 0
+    booking_table = Booking._meta.db_table
+    while True:
+        rows = list(
+            Booking.objects.filter(guest__isnull=True, id__gt=last_id).order_by('id').values_list(
+                'id', 'customer_name', 'customer_phone', 'customer_email'
+            )[:batch_size]
+        )
+        if not rows:
+            return linked, created
+        last_id = rows[-1][0]
+
+        # Первое бронирование гостя в пачке задает имя и контакты нового профиля
+        identities = {}
+        links = []
+        for booking_id, name, phone, email in rows:
+            identity = identity_key(phone, email)
+            if identity is not None:
+                identities.setdefault(identity, (name, phone, email))
+                links.append((identity, booking_id))
+        if not links:
+            continue
+
+        with transaction.atomic():
+            guest_ids = dict(Guest.objects.filter(identity__in=identities).values_list('identity', 'id'))
+            missing = [identity for identity in identities if identity not in guest_ids]
+            if missing:
+                # ignore_conflicts: профиль мог появиться одновременно при сохранении
+                # бронирования, поэтому созданные профили считаются по базе данных
+                existing = Guest.objects.filter(identity__in=missing).count()
+                Guest.objects.bulk_create([
+                    Guest(identity=identity, name=identities[identity][0], phone=identities[identity][1],
+                          email=identities[identity][2])
+                    for identity in missing
+                ], ignore_conflicts=True)
+                inserted = dict(Guest.objects.filter(identity__in=missing).values_list('identity', 'id'))
+                guest_ids.update(inserted)
+                created += len(inserted) - existing
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'UPDATE {booking_table} SET guest_id = %s WHERE id = %s AND guest_id IS NULL',
+                    [(guest_ids[identity], booking_id) for identity, booking_id in links],
+                )
+        linked += len(links)
+        if progress:
+            progress(linked, created)
+
+
+def guest_history(guest):
+    """Бронирования гостя, сначала последние"""
+    return guest.bookings.select_related('room__room_type').order_by('-check_in_date', '-id')
+
+
+def guest_summary(guest):
+    """Бронирований, проживаний, сумма и даты первого и последнего заезда гостя (один запрос)"""
+    summary = Booking.objects.filter(guest=guest).aggregate(
+        bookings=Count('id'),
+        stays=Count('id', filter=Q(status__in=('checked_in', 'checked_out'))),
+        lifetime_value=Sum('total_price', filter=~Q(status__in=RELEASED_STATUSES)),
+        first_check_in=Min('check_in_date'),
+        last_check_in=Max('check_in_date'),
+    )
+    summary['lifetime_value'] = summary['lifetime_value'] or 0
+    return summary
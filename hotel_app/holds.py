@@ -0,0 +1,69 @@
+"""Временное удержание номеров между расчетом стоимости и подтверждением.
+
+Удержание действует HOTEL_ROOM_HOLD_MINUTES минут. Просроченные
+удержания просто не учитываются при подборе номеров, поэтому на пути
+расчета стоимости ничего не удаляется: их пачкой удаляет периодическая
+команда sweep_room_holds.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import RoomHold
+
+
+def hold_duration():
+    """Срок удержания номера после расчета стоимости"""
+    return timedelta(minutes=getattr(settings, 'HOTEL_ROOM_HOLD_MINUTES', 10))
+
+
+def new_hold_token():
+    """Идентификатор владельца удержаний (хранится в сессии администратора)"""
+    return uuid.uuid4().hex
+
+
+def active_holds(now=None):
+    """Непросроченные удержания"""
+    return RoomHold.objects.filter(expires_at__gt=now or timezone.now())
+
+
+def place_hold(room, check_in_date, check_out_date, token, has_baby_bed=None):
+    """Удержать номер за владельцем token; прежнее удержание владельца снимается.
+
+    Номер блокируется и заново проверяется на пересечения с бронированиями
+    и чужими удержаниями в той же транзакции, в которой создается
+    удержание (allocation.claim_room), поэтому два администратора не
+    удержат один номер на те же даты. Если предложенный номер уже занят,
+    удерживается следующий свободный номер того же типа (hold.room);
+    если свободных нет - allocation.NoRoomAvailable.
+    """
+    # allocation импортирует этот модуль (active_holds)
+    from .allocation import claim_room
+
+    with transaction.atomic():
+        release_holds(token)
+        room = claim_room(
+            room.room_type_id, check_in_date, check_out_date, has_baby_bed,
+            preferred_room_id=room.pk, hold_token=token,
+        )
+        return RoomHold.objects.create(
+            room=room,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            token=token,
+            expires_at=timezone.now() + hold_duration(),
+        )
+
+
+def release_holds(token):
+    """Снять все удержания владельца token"""
+    RoomHold.objects.filter(token=token).delete()
+
+
+def sweep_expired_holds(now=None):
+    """Удалить просроченные удержания одним запросом; вернуть их количество"""
+    deleted, _ = RoomHold.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
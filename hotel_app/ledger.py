@@ -0,0 +1,175 @@
+"""Журнал проданных ночей (RoomNight).
+
+Одна строка на номер и ночь, которую занимает бронирование, с ценой
+этой ночи. Общая цена бронирования делится между ночами пропорционально
+ценам по дням недели, так что сумма ночей равна total_price. Вопросы
+вида «загрузка по ночам за март» или «продано номеров по типам за день»
+решаются одним GROUP BY по индексу (night, room_type, rate) вместо
+развертывания периодов бронирований в Python.
+
+Журнал поддерживается сигналом post_save бронирования (signals) в той же
+транзакции, что и изменение бронирования; bulk_create и update() сигналов
+не отправляют, после них журнал пересобирается (rebuild_ledger) или
+обновляется явно (sync_booking).
+"""
+from collections import namedtuple
+from datetime import timedelta
+from decimal import ROUND_DOWN, Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import Booking, Price, RoomNight
+from .pricing import WeeklyPriceTable, price_table_for_room
+
+CENT = Decimal('0.01')
+BATCH_SIZE = 5000
+
+# Поля бронирования, нужные для расчета ночей; пересборка читает их через values_list
+LEDGER_FIELDS = ('id', 'room_id', 'check_in_date', 'check_out_date', 'status', 'actual_check_out_date', 'total_price')
+BookingRow = namedtuple('BookingRow', LEDGER_FIELDS)
+# Статусы, при которых у бронирования нет ни одной проданной ночи
+RELEASED_STATUSES = ('cancelled', 'expired')
+
+
+def split_total(total, rates):
+    """Разделить total между ночами пропорционально rates; сумма долей равна total.
+
+    Доли округляются вниз до копейки, остаток добавляется к последней ночи.
+    Если все цены нулевые, total делится поровну.
+    """
+    if not rates:
+        return []
+    total = Decimal(str(total))
+    weights = list(rates)
+    weight_total = sum(weights, Decimal(0))
+    if not weight_total:
+        weights = [Decimal(1)] * len(rates)
+        weight_total = Decimal(len(rates))
+    shares = [(total * weight / weight_total).quantize(CENT, rounding=ROUND_DOWN) for weight in weights]
+    shares[-1] += total - sum(shares, Decimal(0))
+    return shares
+
+
+def stay_end(booking):
+    """Дата, до которой бронирование занимает номер (не включительно).
+
+    Отмененное и просроченное (гость не приехал) бронирование не занимает
+    ни одной ночи. После выезда
+    остаются только прожитые ночи: при досрочном выезде ночи начиная с
+    даты фактического выезда освобождаются.
+    """
+    if booking.status in RELEASED_STATUSES:
+        return booking.check_in_date
+    if booking.status == 'checked_out' and booking.actual_check_out_date:
+        left_on = timezone.localdate(booking.actual_check_out_date)
+        return max(booking.check_in_date, min(booking.check_out_date, left_on))
+    return booking.check_out_date
+
+
+def booking_nights(booking, table):
+    """Пары (ночь, цена) бронирования по таблице цен его типа номера"""
+    nights = [
+        booking.check_in_date + timedelta(days=offset)
+        for offset in range((booking.check_out_date - booking.check_in_date).days)
+    ]
+    # Цена делится по всем запланированным ночам: при досрочном выезде
+    # у оставшихся ночей сохраняются прежние цены
+    rates = split_total(booking.total_price, [table.rate_for(night) for night in nights])
+    end = stay_end(booking)
+    return [(night, rate) for night, rate in zip(nights, rates) if night < end]
+
+
+def ledger_rows(booking, room_type_id, table):
+    return [
+        RoomNight(room_id=booking.room_id, room_type_id=room_type_id, booking_id=booking.id, night=night, rate=rate)
+        for night, rate in booking_nights(booking, table)
+    ]
+
+
+def sync_booking(booking, created=False):
+    """Привести ночи бронирования в журнале в соответствие с бронированием.
+
+    Для нового бронирования ночи только вставляются; для существующего
+    сравниваются с журналом (один запрос) и перезаписываются только при
+    расхождении, поэтому смена статуса при заезде ничего не пишет.
+    """
+    room = booking.room
+    rows = ledger_rows(booking, room.room_type_id, price_table_for_room(room))
+    with transaction.atomic():
+        if not created:
+            stored = list(RoomNight.objects.filter(booking=booking).order_by('night').values_list(
+                'room_id', 'room_type_id', 'night', 'rate'
+            ))
+            expected = [(row.room_id, row.room_type_id, row.night, row.rate) for row in rows]
+            if stored == expected:
+                return
+            RoomNight.objects.filter(booking=booking).delete()
+        RoomNight.objects.bulk_create(rows)
+
+
+def rebuild_ledger(batch_size=BATCH_SIZE, progress=None):
+    """Пересобрать журнал по всем бронированиям; вернуть (было строк, стало строк).
+
+    Бронирования читаются потоком (iterator) вместе с типом и ценой номера,
+    ночи вставляются пачками в одной транзакции. Цены читаются из базы, а не
+    из кэша справочных данных: пересборка выполняется и сразу после массовой
+    загрузки справочников в той же транзакции.
+    """
+    prices = {}
+    for room_type_id, day_of_week, price in Price.objects.values_list('room_type_id', 'day_of_week', 'price'):
+        prices.setdefault(room_type_id, []).append((day_of_week, price))
+    tables = {}
+    bookings = Booking.objects.exclude(status__in=RELEASED_STATUSES).values_list(
+        *LEDGER_FIELDS, 'room__room_type_id', 'room__price_per_night'
+    ).order_by()
+
+    with transaction.atomic():
+        before = RoomNight.objects.count()
+        RoomNight.objects.all().delete()
+        batch = []
+        total = 0
+        for row in bookings.iterator(chunk_size=batch_size):
+            booking = BookingRow._make(row[:len(LEDGER_FIELDS)])
+            room_type_id, room_rate = row[len(LEDGER_FIELDS):]
+            table = tables.get((room_type_id, room_rate))
+            if table is None:
+                table = tables[room_type_id, room_rate] = WeeklyPriceTable.from_prices(
+                    prices.get(room_type_id, ()), room_rate
+                )
+            batch.extend(ledger_rows(booking, room_type_id, table))
+            if len(batch) >= batch_size:
+                RoomNight.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+                if progress:
+                    progress(total)
+        if batch:
+            RoomNight.objects.bulk_create(batch)
+            total += len(batch)
+            if progress:
+                progress(total)
+    return before, total
+
+
+def nights_between(start, end, room_type=None):
+    """Ночи журнала в периоде [start, end), при необходимости одного типа номера"""
+    nights = RoomNight.objects.filter(night__gte=start, night__lt=end)
+    if room_type is not None:
+        nights = nights.filter(room_type=room_type)
+    return nights
+
+
+def occupancy_by_night(start, end, room_type=None):
+    """Продано номеров и выручка по ночам: строки (ночь, номеров, выручка), один запрос"""
+    return nights_between(start, end, room_type).values('night').annotate(
+        rooms=Count('id'), revenue=Sum('rate'),
+    ).order_by('night').values_list('night', 'rooms', 'revenue')
+
+
+def sold_by_type(start, end):
+    """Продано номеров и выручка по ночам и типам: строки (ночь, тип, номеров, выручка), один запрос"""
+    return nights_between(start, end).values('night', 'room_type_id').annotate(
+        rooms=Count('id'), revenue=Sum('rate'),
+    ).order_by('night', 'room_type_id').values_list('night', 'room_type_id', 'rooms', 'revenue')
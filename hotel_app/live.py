@@ -0,0 +1,137 @@
+"""Лента изменений статуса номеров (Server-Sent Events).
+
+Один опросчик на процесс сверяет версию ROOM_STATUS с базой данных не
+чаще раза в HOTEL_LIVE_POLL_INTERVAL секунд и перечитывает компактный
+снимок номеров только после изменения версии. Каждое подключение
+получает полный снимок при открытии, а затем только измененные строки,
+поэтому простаивающие вкладки почти ничего не стоят серверу.
+
+Под WSGI (runserver, gunicorn) долгий поток занимал бы рабочий поток на
+все время подключения, а асинхронный генератор к тому же буферизуется
+целиком. Там лента работает короткими опросами (room_status_poll): ответ
+содержит один снимок и завершается, а EventSource переподключается через
+HOTEL_LIVE_SHORT_POLL_SECONDS секунд. Id события - версия ROOM_STATUS:
+если она не изменилась с прошлого опроса (заголовок Last-Event-ID), снимок
+не читается и не передается.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .allocation import active_bookings
+from .models import Room
+from .versioning import ROOM_STATUS, current_version
+
+
+def room_status_snapshot():
+    """Компактное состояние всех номеров: {room_id: строка} (два запроса)"""
+    guests = {}
+    for room_id, customer_name in active_bookings().order_by(
+        'check_in_date', 'id'
+    ).values_list('room_id', 'customer_name'):
+        guests.setdefault(room_id, []).append(customer_name)
+
+    return {
+        room_id: {
+            'id': room_id,
+            'room_number': room_number,
+            'is_available': is_available,
+            'guests': guests.get(room_id, []),
+        }
+        for room_id, room_number, is_available in Room.objects.order_by(
+            'room_number'
+        ).values_list('id', 'room_number', 'is_available')
+    }
+
+
+def diff_snapshots(old, new):
+    """Строки, изменившиеся между снимками, и id удаленных номеров"""
+    changed = [row for room_id, row in new.items() if old.get(room_id) != row]
+    removed = [room_id for room_id in old if room_id not in new]
+    return changed, removed
+
+
+def format_event(event, data, event_id=None):
+    """Сообщение в формате text/event-stream"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    prefix = f'id: {event_id}\n' if event_id is not None else ''
+    return f'{prefix}event: {event}\ndata: {payload}\n\n'
+
+
+def room_status_poll(last_event_id=None):
+    """Ответ короткого опроса (WSGI): снимок, если версия изменилась после last_event_id"""
+    retry = int(getattr(settings, 'HOTEL_LIVE_SHORT_POLL_SECONDS', 5) * 1000)
+    version = current_version(ROOM_STATUS)
+    if last_event_id == str(version):
+        return f'retry: {retry}\n\n'
+    snapshot = room_status_snapshot()
+    return f'retry: {retry}\n\n' + format_event(
+        'snapshot', {'version': version, 'rooms': list(snapshot.values())}, event_id=version
+    )
+
+
+class RoomStatusFeed:
+    """Общий для всех подключений процесса источник снимков статуса номеров"""
+
+    def __init__(self):
+        self._lock = None
+        self._checked_at = 0.0
+        self.version = None
+        self.snapshot = {}
+
+    @property
+    def poll_interval(self):
+        return getattr(settings, 'HOTEL_LIVE_POLL_INTERVAL', 2.0)
+
+    async def current(self):
+        """Актуальные (версия, снимок); база данных опрашивается не чаще poll_interval"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = time.monotonic()
+            if self.version is None or now - self._checked_at >= self.poll_interval:
+                version = await sync_to_async(current_version)(ROOM_STATUS)
+                if version != self.version:
+                    self.snapshot = await sync_to_async(room_status_snapshot)()
+                    self.version = version
+                self._checked_at = now
+        return self.version, self.snapshot
+
+
+feed = RoomStatusFeed()
+
+
+async def room_status_events():
+    """Поток событий для одного подключения.
+
+    Поток завершается через HOTEL_LIVE_STREAM_SECONDS секунд, после чего
+    EventSource переподключается сам; так соединения закрытых вкладок
+    не висят на сервере бесконечно.
+    """
+    lifetime = getattr(settings, 'HOTEL_LIVE_STREAM_SECONDS', 300)
+    heartbeat = getattr(settings, 'HOTEL_LIVE_HEARTBEAT_SECONDS', 15)
+    started = last_sent = time.monotonic()
+
+    version, snapshot = await feed.current()
+    yield 'retry: 5000\n\n'
+    yield format_event('snapshot', {'version': version, 'rooms': list(snapshot.values())}, event_id=version)
+
+    while time.monotonic() - started < lifetime:
+        await asyncio.sleep(feed.poll_interval)
+        new_version, new_snapshot = await feed.current()
+        if new_version != version:
+            changed, removed = diff_snapshots(snapshot, new_snapshot)
+            version, snapshot = new_version, new_snapshot
+            if changed or removed:
+                yield format_event(
+                    'rooms', {'version': version, 'changed': changed, 'removed': removed}, event_id=version
+                )
+                last_sent = time.monotonic()
+                continue
+        if time.monotonic() - last_sent >= heartbeat:
+            # Комментарий поддерживает соединение через прокси
+            yield ': ping\n\n'
+            last_sent = time.monotonic()
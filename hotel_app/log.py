@@ -0,0 +1,102 @@
+"""Структурированное журналирование и журнал медленных операций.
+
+Медленные SQL-запросы фиксируются обработчиком, который подключается к
+каждому новому соединению с базой данных, поэтому они видны и в
+представлениях, и в командах управления. Медленные запросы HTTP
+фиксирует SlowOperationMiddleware. Оба пишут в журнал hotel_app.slow.
+"""
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+slow_logger = logging.getLogger('hotel_app.slow')
+
+# Поля, которые передаются через extra= и выводятся как key=value
+STRUCTURED_FIELDS = (
+    'room_id', 'room_number', 'booking_id', 'status', 'duration_ms', 'sql', 'path', 'method',
+)
+
+
+class StructuredFormatter(logging.Formatter):
+    """Дописывает к сообщению поля из extra= в виде key=value"""
+
+    def format(self, record):
+        message = super().format(record)
+        fields = [
+            f'{name}={getattr(record, name)!r}'
+            for name in STRUCTURED_FIELDS
+            if hasattr(record, name)
+        ]
+        return f'{message} {" ".join(fields)}' if fields else message
+
+
+def slow_query_threshold():
+    """Порог медленного SQL-запроса в миллисекундах (0 - не отслеживать)"""
+    return getattr(settings, 'HOTEL_SLOW_QUERY_MS', 0)
+
+
+def slow_request_threshold():
+    """Порог медленного запроса HTTP в миллисекундах (0 - не отслеживать)"""
+    return getattr(settings, 'HOTEL_SLOW_REQUEST_MS', 0)
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """Обработчик connection.execute_wrappers: записывает SQL дольше порога"""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        threshold = slow_query_threshold()
+        if threshold and duration_ms >= threshold:
+            slow_logger.warning(
+                'Медленный SQL-запрос: %.1f мс', duration_ms,
+                extra={'duration_ms': round(duration_ms, 1), 'sql': sql},
+            )
+
+
+def install_slow_query_logger(sender, connection, **kwargs):
+    """Подключить log_slow_query к новому соединению (сигнал connection_created)"""
+    if slow_query_threshold() and log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_query)
+
+
+class SlowOperationMiddleware:
+    """Записывает запросы HTTP, обработка которых дольше HOTEL_SLOW_REQUEST_MS"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.log(request, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.log(request, started)
+        return response
+
+    def log(self, request, started):
+        duration_ms = (time.perf_counter() - started) * 1000
+        threshold = slow_request_threshold()
+        if threshold and duration_ms >= threshold:
+            slow_logger.warning(
+                'Медленный запрос %s %s: %.1f мс', request.method, request.path, duration_ms,
+                extra={
+                    'duration_ms': round(duration_ms, 1),
+                    'path': request.path,
+                    'method': request.method,
+                },
+            )
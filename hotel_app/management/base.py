@@ -0,0 +1,61 @@
+"""Общая основа команд сверки статуса номеров"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from hotel_app.reconciliation import reconcile
+
+
+class ReconciliationCommand(BaseCommand):
+    """Команда, которая сверяет статус номеров через hotel_app.reconciliation.
+
+    Подклассы задают только тексты сообщений.
+    """
+    fix_help = 'Автоматически исправить статус номеров'
+    start_message = 'Начало проверки статуса номеров...'
+    mismatch_message = 'Номер {room_number}: несоответствие статуса (текущий: {current}, должен быть: {expected})'
+    available_text = 'Свободен'
+    occupied_text = 'Занят'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help=self.fix_help)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать несоответствия, ничего не изменяя (отменяет --fix)',
+        )
+        parser.add_argument('--json', action='store_true', help='Вывести результат в формате JSON')
+
+    def status_text(self, is_available):
+        return self.available_text if is_available else self.occupied_text
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run'] or not options['fix']
+        if not options['json']:
+            self.stdout.write(self.start_message)
+
+        report = reconcile(dry_run=dry_run)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report.as_dict(), ensure_ascii=False, indent=2))
+            return
+
+        for room_id, room_number, is_available in report.mismatches:
+            self.stdout.write(self.mismatch_message.format(
+                room_number=room_number,
+                current=self.status_text(is_available),
+                expected=self.status_text(not is_available),
+            ))
+
+        timings = ', '.join(f'{stage} {ms:.1f} мс' for stage, ms in report.timings_ms.items())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Проверка завершена! Найдено {len(report.mismatches)} несоответствий статуса ({timings})'
+            )
+        )
+        if not dry_run:
+            self.stdout.write(self.style.SUCCESS(f'Исправлено статусов {report.fixed} номеров'))
+        elif report.mismatches:
+            self.stdout.write(
+                self.style.WARNING('Для автоматического исправления используйте параметр --fix')
+            )
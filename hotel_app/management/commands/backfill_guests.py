@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from hotel_app.guests import BATCH_SIZE, backfill_guests
+
+class Command(BaseCommand):
+    help = 'Создать профили гостей и привязать к ним бронирования без гостя (по телефону или почте)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Бронирований в одной транзакции')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Привязка бронирований к профилям гостей...')
+        started = time.perf_counter()
+        
+        def progress(linked, created):
+            self.stdout.write(f'  привязано бронирований: {linked}, новых гостей: {created}')
+        
+        linked, created = backfill_guests(
+            batch_size=max(1, options['batch_size']),
+            progress=progress if options['verbosity'] > 1 else None,
+        )
+        elapsed = time.perf_counter() - started
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Готово за {elapsed:.1f} с: привязано бронирований {linked}, создано гостей {created}')
+        )
@@ -0,0 +1,52 @@
+import json
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from hotel_app.expiry import stale_bookings, sweep_stale_bookings
+
+class Command(BaseCommand):
+    help = 'Перевести в статус «Просрочено» бронирования, по которым гость не приехал (запускать периодически)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help='Считать сегодняшним днем эту дату, ГГГГ-ММ-ДД')
+        parser.add_argument('--batch-size', type=int, help='Бронирований в одной транзакции (HOTEL_BOOKING_EXPIRY_BATCH_SIZE)')
+        parser.add_argument('--pause', type=float, default=0, help='Пауза между пакетами, секунд')
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Не завершаться, а повторять просрочку каждые столько секунд (вместо запуска из cron)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что будет просрочено')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в формате JSON')
+
+    def handle(self, *args, **options):
+        if options['dry_run'] and not options['json']:
+            self.list_stale(options['date'] or timezone.localdate())
+
+        while True:
+            result = sweep_stale_bookings(
+                today=options['date'],
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+                dry_run=options['dry_run'],
+            )
+            if options['json']:
+                self.stdout.write(json.dumps(result.as_dict(), ensure_ascii=False))
+            else:
+                style = self.style.WARNING if result.dry_run else self.style.SUCCESS
+                self.stdout.write(style(f'{timezone.localtime():%Y-%m-%d %H:%M:%S} {result.summary()}'))
+
+            if not options['interval'] or options['dry_run']:
+                return
+            time.sleep(options['interval'])
+
+    def list_stale(self, today):
+        rows = stale_bookings(today).order_by('check_in_date', 'id').values_list(
+            'id', 'room__room_number', 'customer_name', 'check_in_date', 'status'
+        )
+        for booking_id, room_number, customer_name, check_in_date, status in rows:
+            self.stdout.write(
+                f'Номер {room_number}: {customer_name}, заезд {check_in_date:%d.%m.%Y}, {status} (бронирование {booking_id})'
+            )
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from hotel_app.models import Booking, Room
+from hotel_app.synthetic import SyntheticDataset
+
+class Command(BaseCommand):
+    help = 'Создать синтетический набор номеров и бронирований для нагрузочных испытаний'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=100, help='Количество номеров')
+        parser.add_argument('--room-types', type=int, default=3, help='Количество типов номеров')
+        parser.add_argument('--years', type=float, default=1.0, help='Глубина истории бронирований в годах')
+        parser.add_argument('--occupancy', type=float, default=0.7, help='Средняя загрузка номеров (0..1)')
+        parser.add_argument('--future-days', type=int, default=90, help='Горизонт будущих бронирований в днях')
+        parser.add_argument('--seed', type=int, default=42, help='Начальное значение генератора случайных чисел')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Размер пачки bulk_create')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Удалить существующие номера, цены и бронирования перед генерацией',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            dataset = SyntheticDataset(
+                rooms=options['rooms'],
+                room_types=options['room_types'],
+                years=options['years'],
+                occupancy=options['occupancy'],
+                seed=options['seed'],
+                future_days=options['future_days'],
+                batch_size=options['batch_size'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        if options['clear']:
+            self.stdout.write('Удаление существующих данных...')
+            dataset.clear()
+        elif Room.objects.exists() or Booking.objects.exists():
+            raise CommandError('В базе уже есть номера или бронирования. Используйте параметр --clear')
+        
+        self.stdout.write(
+            f'Генерация: номеров {dataset.rooms}, типов {dataset.room_types}, '
+            f'лет истории {dataset.years}, загрузка {dataset.occupancy:.0%}, seed {dataset.seed}'
+        )
+        started = time.perf_counter()
+        
+        def progress(total):
+            self.stdout.write(f'  создано бронирований: {total}')
+        
+        summary = dataset.generate(progress=progress if options['verbosity'] > 1 else None)
+        elapsed = time.perf_counter() - started
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Создано номеров {summary["rooms"]}, бронирований {summary["bookings"]}, '
+                f'проданных ночей {summary["room_nights"]}, гостей {summary["guests"]} '
+                f'за {elapsed:.1f} с'
+            )
+        )
@@ -0,0 +1,60 @@
+import json
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from hotel_app.models import RoomType
+from hotel_app.reports import default_period, room_type_report, totals
+
+class Command(BaseCommand):
+    help = 'Загрузка, ADR и RevPAR по типам номеров и месяцам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='Начало периода, ГГГГ-ММ-ДД (по умолчанию год назад)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Конец периода не включительно, ГГГГ-ММ-ДД')
+        parser.add_argument('--workers', type=int, help='Количество процессов (по умолчанию по числу процессоров)')
+        parser.add_argument('--refresh', action='store_true', help='Пересчитать сохраненные закрытые месяцы')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в формате JSON')
+
+    def handle(self, *args, **options):
+        start, end = default_period()
+        start = options['start'] or start
+        end = options['end'] or end
+        if end <= start:
+            raise CommandError('Конец периода должен быть позже начала')
+        
+        started = time.perf_counter()
+        metrics = room_type_report(start, end, workers=options['workers'], refresh=options['refresh'])
+        elapsed = time.perf_counter() - started
+        by_type = totals(metrics)
+        overall = totals(metrics, by_room_type=False)
+        
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'periods': [item.as_dict() for item in metrics],
+                'room_types': [item.as_dict() for item in by_type.values()],
+                'total': overall.as_dict() if overall else None,
+            }, ensure_ascii=False, indent=2))
+            return
+        
+        names = dict(RoomType.objects.values_list('id', 'name'))
+        
+        def line(label, item):
+            return (
+                f'  {label:<28} загрузка {item.occupancy:>6.1%}  ADR {item.adr:>10}  '
+                f'RevPAR {item.revpar:>10}  продано {item.rooms_sold:>7}  выручка {item.revenue:>14}'
+            )
+        
+        month = None
+        for item in metrics:
+            if item.start != month:
+                month = item.start
+                self.stdout.write(f'\n{item.start:%Y-%m-%d} - {item.end:%Y-%m-%d}')
+            self.stdout.write(line(names.get(item.room_type_id, item.room_type_id), item))
+        
+        self.stdout.write(f'\nИтого {start:%Y-%m-%d} - {end:%Y-%m-%d}')
+        for room_type_id, item in by_type.items():
+            self.stdout.write(line(names.get(room_type_id, room_type_id), item))
+        if overall:
+            self.stdout.write(line('Все типы', overall))
+        self.stdout.write(self.style.SUCCESS(f'Отчет построен за {elapsed:.2f} с'))
@@ -0,0 +1,54 @@
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from hotel_app.frontdesk import MAX_BATCH_SIZE, batch_transition, due_departures
+
+class Command(BaseCommand):
+    help = 'Выселить всех гостей с плановым выездом на дату (по умолчанию сегодня) пакетами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help='Дата выезда, ГГГГ-ММ-ДД (включая просроченные выезды)')
+        parser.add_argument('--batch-size', type=int, default=MAX_BATCH_SIZE, help='Бронирований в одной транзакции')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, кто будет выселен')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в формате JSON')
+
+    def handle(self, *args, **options):
+        on_date = options['date'] or timezone.localdate()
+        departures = list(
+            due_departures(on_date).order_by('room__room_number').values_list(
+                'id', 'room__room_number', 'customer_name'
+            )
+        )
+        
+        if options['dry_run']:
+            if options['json']:
+                self.stdout.write(json.dumps([
+                    {'booking_id': booking_id, 'room_number': room_number, 'customer_name': customer_name}
+                    for booking_id, room_number, customer_name in departures
+                ], ensure_ascii=False, indent=2))
+                return
+            for booking_id, room_number, customer_name in departures:
+                self.stdout.write(f'Номер {room_number}: {customer_name} (бронирование {booking_id})')
+            self.stdout.write(self.style.WARNING(f'К выселению: {len(departures)}; для выполнения запустите без --dry-run'))
+            return
+        
+        ids = [booking_id for booking_id, room_number, customer_name in departures]
+        size = max(1, min(options['batch_size'], MAX_BATCH_SIZE))
+        results = [batch_transition('check_out', ids[start:start + size]) for start in range(0, len(ids), size)]
+        
+        if options['json']:
+            self.stdout.write(json.dumps([result.as_dict() for result in results], ensure_ascii=False, indent=2))
+            return
+        
+        done = sum(len(result.done) for result in results)
+        rooms = sum(len(result.rooms_changed) for result in results)
+        for result in results:
+            for item in result.skipped:
+                self.stdout.write(self.style.WARNING(
+                    f'Бронирование {item.booking_id} пропущено: {item.outcome} ({item.status})'
+                ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Выселено гостей {done} из {len(ids)} (выезд до {on_date:%d.%m.%Y}), освобождено номеров {rooms}'
+        ))
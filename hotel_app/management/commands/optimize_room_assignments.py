@@ -0,0 +1,51 @@
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from hotel_app.assignment import optimize_assignments
+from hotel_app.models import RoomType
+
+class Command(BaseCommand):
+    help = (
+        'Переставить будущие бронирования по номерам так, чтобы в календаре не оставались '
+        'непродаваемые окна между проживаниями'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room-type', help='Только этот тип номера (id или название)')
+        parser.add_argument('--days', type=int, help='Горизонт в днях (HOTEL_ASSIGNMENT_HORIZON_DAYS)')
+        parser.add_argument('--date', type=date.fromisoformat, help='Считать сегодняшним днем эту дату, ГГГГ-ММ-ДД')
+        parser.add_argument('--dry-run', action='store_true', help='Только рассчитать раскладку, ничего не менять')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в формате JSON')
+
+    def handle(self, *args, **options):
+        room_type = None
+        if options['room_type']:
+            value = options['room_type']
+            room_type = RoomType.objects.filter(pk=value).first() if value.isdigit() else None
+            room_type = room_type or RoomType.objects.filter(name=value).first()
+            if room_type is None:
+                raise CommandError(f'Тип номера не найден: {value}')
+        if options['days'] is not None and options['days'] < 1:
+            raise CommandError('Горизонт должен быть не меньше одного дня')
+
+        result = optimize_assignments(
+            room_type=room_type,
+            today=options['date'],
+            days=options['days'],
+            dry_run=options['dry_run'],
+        )
+        if options['json']:
+            self.stdout.write(json.dumps(result.as_dict(), ensure_ascii=False))
+            return
+
+        for room_class in result.classes:
+            row = room_class.as_dict()
+            bed = 'с кроваткой' if row['has_baby_bed'] else 'без кроватки'
+            self.stdout.write(
+                f'{row["room_type"]}, {bed}: номеров {row["rooms"]}, переставляемых {row["movable"]}, '
+                f'перестановок {row["moved"]}, непродаваемых ночей {row["orphan_nights_before"]} -> '
+                f'{row["orphan_nights_after"]} ({row["outcome"]})'
+            )
+        style = self.style.WARNING if result.dry_run else self.style.SUCCESS
+        self.stdout.write(style(result.summary()))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from hotel_app.models import RoomType
+from hotel_app.occupancy import rebuild_counters
+
+class Command(BaseCommand):
+    help = 'Пересчитать счетчики занятости по типам номеров и показать расхождения'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Пересчет счетчиков занятости...')
+        
+        drift = rebuild_counters()
+        names = dict(RoomType.objects.values_list('id', 'name'))
+        
+        for room_type_id, stored, actual in drift:
+            name = names.get(room_type_id, room_type_id)
+            if stored is None:
+                self.stdout.write(
+                    f'Тип номера {name}: счетчик отсутствовал '
+                    f'(должно быть: всего {actual[0]}, доступно {actual[1]})'
+                )
+            else:
+                self.stdout.write(
+                    f'Тип номера {name}: расхождение счетчиков '
+                    f'(было: всего {stored[0]}, доступно {stored[1]}; '
+                    f'стало: всего {actual[0]}, доступно {actual[1]})'
+                )
+        
+        if drift:
+            self.stdout.write(
+                self.style.WARNING(f'Исправлено расхождений: {len(drift)}')
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS('Счетчики занятости соответствуют данным')
+            )
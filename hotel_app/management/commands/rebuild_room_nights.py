@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from hotel_app.ledger import BATCH_SIZE, rebuild_ledger
+from hotel_app.models import RoomTypeMonthReport
+
+class Command(BaseCommand):
+    help = 'Пересобрать журнал проданных ночей (RoomNight) по всем бронированиям'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Размер пачки bulk_create')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Пересборка журнала проданных ночей...')
+        started = time.perf_counter()
+        
+        def progress(total):
+            self.stdout.write(f'  записано ночей: {total}')
+        
+        before, after = rebuild_ledger(
+            batch_size=options['batch_size'],
+            progress=progress if options['verbosity'] > 1 else None,
+        )
+        # Сохраненные отчеты за закрытые месяцы построены по прежнему журналу
+        RoomTypeMonthReport.objects.all().delete()
+        elapsed = time.perf_counter() - started
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Журнал пересобран за {elapsed:.1f} с: было ночей {before}, стало {after}')
+        )
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from hotel_app.benchmarks import SUITES, compare_reports, load_report, run_suites, save_report
+
+SUMMARY_FIELDS = {'samples', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'queries'}
+
+class Command(BaseCommand):
+    help = 'Выполнить измерения производительности и сохранить результаты в JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'suites',
+            nargs='*',
+            help=f'Наборы измерений: {", ".join(SUITES)} (по умолчанию views)',
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Количество замеров каждого измерения')
+        parser.add_argument('--output', help='Файл для сохранения результатов в JSON')
+        parser.add_argument('--compare', help='JSON предыдущего прогона для сравнения')
+
+    def handle(self, *args, **options):
+        names = options['suites'] or ['views']
+        unknown = [name for name in names if name not in SUITES]
+        if unknown:
+            raise CommandError(f'Неизвестные наборы измерений: {", ".join(unknown)}')
+        
+        report = run_suites(names, options['iterations'])
+        dataset = report['dataset']
+        self.stdout.write(
+            f'Данные: номеров {dataset["rooms"]}, бронирований {dataset["bookings"]}, '
+            f'замеров {options["iterations"]}'
+        )
+        
+        for suite, results in report['suites'].items():
+            self.stdout.write(f'\n[{suite}]')
+            for name, result in results.items():
+                if 'p50_ms' in result:
+                    self.stdout.write(
+                        f'  {name:<28} p50 {result["p50_ms"]:>9.2f} мс  p90 {result["p90_ms"]:>9.2f} мс  '
+                        f'p99 {result["p99_ms"]:>9.2f} мс  запросов {result.get("queries", "-")}'
+                    )
+                    extra = ', '.join(
+                        f'{key}={value}' for key, value in result.items() if key not in SUMMARY_FIELDS
+                    )
+                    if extra:
+                        self.stdout.write(f'  {"":<28} {extra}')
+                else:
+                    details = ', '.join(f'{key}={value}' for key, value in result.items())
+                    self.stdout.write(f'  {name:<28} {details}')
+        
+        output = options['output'] or f'benchmark-{timezone.now():%Y%m%d-%H%M%S}.json'
+        save_report(report, output)
+        self.stdout.write(self.style.SUCCESS(f'\nРезультаты сохранены в {output}'))
+        
+        if options['compare']:
+            self.stdout.write(f'\nСравнение с {options["compare"]}:')
+            for suite, name, before, after, change, queries_before, queries_after in compare_reports(
+                load_report(options['compare']), report
+            ):
+                self.stdout.write(
+                    f'  {suite}.{name:<28} p50 {before:.2f} -> {after:.2f} мс ({change:+.1f}%), '
+                    f'запросов {queries_before} -> {queries_after}'
+                )
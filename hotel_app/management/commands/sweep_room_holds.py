@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from hotel_app.holds import sweep_expired_holds
+
+class Command(BaseCommand):
+    help = 'Удалить просроченные удержания номеров (запускать периодически, например из cron)'
+
+    def handle(self, *args, **options):
+        deleted = sweep_expired_holds()
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено просроченных удержаний: {deleted}')
+        )
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0004_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomTypeOccupancy',
+            fields=[
+                ('room_type', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='occupancy', serialize=False, to='hotel_app.roomtype', verbose_name='Тип номера')),
+                ('total_rooms', models.PositiveIntegerField(default=0, verbose_name='Всего номеров')),
+                ('available_rooms', models.IntegerField(default=0, verbose_name='Доступно')),
+            ],
+            options={
+                'verbose_name': 'Занятость по типу номера',
+                'verbose_name_plural': 'Занятость по типам номеров',
+            },
+        ),
+    ]
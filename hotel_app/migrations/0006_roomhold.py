@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0005_roomtypeoccupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('check_in_date', models.DateField(verbose_name='Дата заезда')),
+                ('check_out_date', models.DateField(verbose_name='Дата выезда')),
+                ('token', models.CharField(db_index=True, max_length=32, verbose_name='Владелец')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Действует до')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='hotel_app.room', verbose_name='Номер')),
+            ],
+            options={
+                'verbose_name': 'Удержание номера',
+                'verbose_name_plural': 'Удержания номеров',
+                'indexes': [models.Index(fields=['room', 'check_in_date', 'check_out_date'], name='roomhold_room_dates_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0007_booking_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('night', models.DateField(verbose_name='Ночь')),
+                ('rate', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена за ночь')),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='hotel_app.booking', verbose_name='Бронирование')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='hotel_app.room', verbose_name='Номер')),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='hotel_app.roomtype', verbose_name='Тип номера')),
+            ],
+            options={
+                'verbose_name': 'Проданная ночь',
+                'verbose_name_plural': 'Проданные ночи',
+                'indexes': [models.Index(fields=['night', 'room_type', 'rate'], name='roomnight_night_type_idx'), models.Index(fields=['room', 'night'], name='roomnight_room_night_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0008_roomnight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomTypeMonthReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('rooms_available', models.PositiveIntegerField(default=0, verbose_name='Номеро-ночей в продаже')),
+                ('rooms_sold', models.PositiveIntegerField(default=0, verbose_name='Продано номеро-ночей')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Рассчитано')),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='hotel_app.roomtype', verbose_name='Тип номера')),
+            ],
+            options={
+                'verbose_name': 'Отчет по типу номера за месяц',
+                'verbose_name_plural': 'Отчеты по типам номеров за месяц',
+                'unique_together': {('month', 'room_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:07
+
+import re
+
+from django.db import OperationalError, migrations, models
+
+BATCH_SIZE = 5000
+
+# Копии нормализации и схемы полнотекстового индекса из hotel_app.search на
+# момент миграции: миграция не должна меняться вместе с кодом приложения
+NON_DIGITS = re.compile(r'\D+')
+FTS_TABLE = 'hotel_app_booking_fts'
+FTS_TRIGGERS = ('hotel_app_booking_fts_ai', 'hotel_app_booking_fts_ad', 'hotel_app_booking_fts_au')
+FTS_SCHEMA = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name_key, content='hotel_app_booking', content_rowid='id', prefix='1 2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS hotel_app_booking_fts_ai AFTER INSERT ON hotel_app_booking BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name_key) VALUES (new.id, new.name_key);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS hotel_app_booking_fts_ad AFTER DELETE ON hotel_app_booking BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name_key) VALUES ('delete', old.id, old.name_key);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS hotel_app_booking_fts_au AFTER UPDATE OF name_key ON hotel_app_booking
+    WHEN old.name_key IS NOT new.name_key BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name_key) VALUES ('delete', old.id, old.name_key);
+        INSERT INTO {FTS_TABLE}(rowid, name_key) VALUES (new.id, new.name_key);
+    END""",
+)
+
+
+def normalize_phone(value):
+    digits = NON_DIGITS.sub('', value or '')
+    if digits.startswith('8') and len(digits) == 11:
+        digits = '7' + digits[1:]
+    return digits
+
+
+def name_key(value):
+    return ' '.join((value or '').lower().replace('ё', 'е').split())[:100]
+
+
+def fill_search_keys(apps, schema_editor):
+    """Заполнить столбцы поиска существующих бронирований пачками по id"""
+    Booking = apps.get_model('hotel_app', 'Booking')
+    last_id = 0
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            rows = list(
+                Booking.objects.using(schema_editor.connection.alias).filter(id__gt=last_id)
+                .order_by('id').values_list('id', 'customer_name', 'customer_phone')[:BATCH_SIZE]
+            )
+            if not rows:
+                return
+            cursor.executemany(
+                'UPDATE hotel_app_booking SET phone_digits = %s, name_key = %s WHERE id = %s',
+                [(normalize_phone(phone), name_key(name), booking_id) for booking_id, name, phone in rows],
+            )
+            last_id = rows[-1][0]
+
+
+def create_fts(apps, schema_editor):
+    """Создать полнотекстовый индекс имен (только SQLite с FTS5)"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            for statement in FTS_SCHEMA:
+                cursor.execute(statement)
+        except OperationalError:
+            # SQLite собран без FTS5
+            return
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def remove_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for trigger in FTS_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0011_booking_expired_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='name_key',
+            field=models.CharField(default='', editable=False, max_length=100, verbose_name='Имя для поиска'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='phone_digits',
+            field=models.CharField(default='', editable=False, max_length=20, verbose_name='Цифры телефона'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['phone_digits'], name='booking_phone_digits_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['name_key'], name='booking_name_key_idx'),
+        ),
+        migrations.RunPython(fill_search_keys, migrations.RunPython.noop),
+        # Полнотекстовый индекс имен только на SQLite с FTS5
+        migrations.RunPython(create_fts, remove_fts),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0012_booking_search_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Guest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identity', models.CharField(max_length=260, unique=True, verbose_name='Идентификатор')),
+                ('name', models.CharField(max_length=100, verbose_name='Имя')),
+                ('phone', models.CharField(blank=True, max_length=20, verbose_name='Телефон')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='Электронная почта')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+            ],
+            options={
+                'verbose_name': 'Гость',
+                'verbose_name_plural': 'Гости',
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='customer_email',
+            field=models.EmailField(blank=True, default='', max_length=254, verbose_name='Электронная почта клиента'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='guest',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='hotel_app.guest', verbose_name='Гость'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0013_guest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='room_locked',
+            field=models.BooleanField(default=False, help_text='Гость просил именно этот номер', verbose_name='Номер закреплен'),
+        ),
+    ]
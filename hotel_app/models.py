@@ -63,6 +63,22 @@ class Price(models.Model):
     def __str__(self):
         return f"{self.room_type.name} - {self.get_day_of_week_display()}: {self.price}"
 
+class Guest(models.Model):
+    """Гость: профиль, к которому привязаны все его бронирования"""
+    # Нормализованный телефон или почта (hotel_app.guests.identity_key), один профиль на гостя
+    identity = models.CharField('Идентификатор', max_length=260, unique=True)
+    name = models.CharField('Имя', max_length=100)
+    phone = models.CharField('Телефон', max_length=20, blank=True)
+    email = models.EmailField('Электронная почта', blank=True)
+    created_at = models.DateTimeField('Создан', auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Гость'
+        verbose_name_plural = 'Гости'
+    
+    def __str__(self):
+        return f"{self.name} ({self.phone or self.email})"
+
 class Booking(models.Model):
     """Модель бронирования"""
     STATUS_CHOICES = [
@@ -71,10 +87,17 @@ class Booking(models.Model):
         ('cancelled', 'Отменено'),
         ('checked_in', 'Проживает'),
         ('checked_out', 'Выехал'),
+        ('expired', 'Просрочено'),
     ]
+    # Статусы, при которых бронирование больше не занимает номер
+    INACTIVE_STATUSES = ('cancelled', 'checked_out', 'expired')
     
     customer_name = models.CharField('Имя клиента', max_length=100)
     customer_phone = models.CharField('Телефон клиента', max_length=20)
+    customer_email = models.EmailField('Электронная почта клиента', blank=True, default='')
+    # Заполняется при сохранении (signals) или командой backfill_guests
+    guest = models.ForeignKey(Guest, on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='bookings', verbose_name='Гость')
     room = models.ForeignKey(Room, on_delete=models.CASCADE, verbose_name='Номер')
     check_in_date = models.DateField('Дата заезда')
     check_out_date = models.DateField('Дата выезда')
@@ -84,10 +107,127 @@ class Booking(models.Model):
     actual_check_out_date = models.DateTimeField('Фактическая дата выезда', null=True, blank=True)
     total_price = models.DecimalField('Общая цена', max_digits=10, decimal_places=2, 
                                      validators=[MinValueValidator(0)])
+    # Поля для поиска гостей (hotel_app.search), заполняются при сохранении
+    phone_digits = models.CharField('Цифры телефона', max_length=20, default='', editable=False)
+    name_key = models.CharField('Имя для поиска', max_length=100, default='', editable=False)
+    # Оптимизатор распределения (hotel_app.assignment) не переселяет такое бронирование
+    room_locked = models.BooleanField('Номер закреплен', default=False,
+                                      help_text='Гость просил именно этот номер')
     
     class Meta:
         verbose_name = 'Бронирование'
         verbose_name_plural = 'Бронирования'
+        indexes = [
+            # Поиск пересечений периодов проживания по номеру
+            models.Index(fields=['room', 'check_in_date', 'check_out_date'], name='booking_room_dates_idx'),
+            # Бронирования номера в заданном статусе
+            models.Index(fields=['room', 'status'], name='booking_room_status_idx'),
+            # Списки заезда/выезда и фильтр по статусу в порядке даты бронирования
+            models.Index(fields=['status', 'booking_date'], name='booking_status_booked_idx'),
+            # Фильтры по периоду проживания без привязки к номеру
+            models.Index(fields=['check_in_date', 'check_out_date'], name='booking_dates_idx'),
+            # Постраничный список бронирований (сортировка -booking_date, -id)
+            models.Index(fields=['booking_date', 'id'], name='booking_booked_idx'),
+            # Поиск гостя по началу телефона и имени
+            models.Index(fields=['phone_digits'], name='booking_phone_digits_idx'),
+            models.Index(fields=['name_key'], name='booking_name_key_idx'),
+            # Последние выезды на странице заезда/выезда
+            models.Index(fields=['status', 'actual_check_out_date'], name='booking_status_checkout_idx'),
+            # Активные бронирования (статус номеров, условие совпадает с
+            # INACTIVE_STATUSES): частичный индекс там, где
+            # база данных их поддерживает; иначе Django его не создает
+            models.Index(
+                fields=['check_in_date', 'id'],
+                condition=~models.Q(status__in=('cancelled', 'checked_out', 'expired')),
+                name='booking_active_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.customer_name} - {self.room.room_number}"
+
+class DataVersion(models.Model):
+    """Счетчик версии данных, общий для всех рабочих процессов"""
+    key = models.CharField('Ключ', max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField('Версия', default=0)
+    
+    class Meta:
+        verbose_name = 'Версия данных'
+        verbose_name_plural = 'Версии данных'
+    
+    def __str__(self):
+        return f"{self.key}: {self.version}"
+
+class RoomTypeOccupancy(models.Model):
+    """Денормализованные счетчики занятости по типу номера"""
+    room_type = models.OneToOneField(RoomType, on_delete=models.CASCADE, primary_key=True,
+                                     related_name='occupancy', verbose_name='Тип номера')
+    total_rooms = models.PositiveIntegerField('Всего номеров', default=0)
+    available_rooms = models.IntegerField('Доступно', default=0)
+    
+    class Meta:
+        verbose_name = 'Занятость по типу номера'
+        verbose_name_plural = 'Занятость по типам номеров'
+    
+    def __str__(self):
+        return f"{self.room_type_id}: {self.available_rooms}/{self.total_rooms}"
+
+class RoomHold(models.Model):
+    """Временное удержание номера между расчетом стоимости и подтверждением заезда"""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='holds', verbose_name='Номер')
+    check_in_date = models.DateField('Дата заезда')
+    check_out_date = models.DateField('Дата выезда')
+    # Идентификатор сессии администратора, получившего расчет
+    token = models.CharField('Владелец', max_length=32, db_index=True)
+    expires_at = models.DateTimeField('Действует до', db_index=True)
+    
+    class Meta:
+        verbose_name = 'Удержание номера'
+        verbose_name_plural = 'Удержания номеров'
+        indexes = [
+            models.Index(fields=['room', 'check_in_date', 'check_out_date'], name='roomhold_room_dates_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.room_id}: {self.check_in_date} - {self.check_out_date} до {self.expires_at}"
+
+class RoomNight(models.Model):
+    """Проданная ночь номера: одна строка на номер и ночь проживания по бронированию"""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='nights', verbose_name='Номер')
+    # Копия room.room_type_id: загрузка по типам номеров считается без JOIN
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='+', verbose_name='Тип номера')
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='nights', verbose_name='Бронирование')
+    night = models.DateField('Ночь')
+    # Доля общей цены бронирования, приходящаяся на эту ночь
+    rate = models.DecimalField('Цена за ночь', max_digits=10, decimal_places=2)
+    
+    class Meta:
+        verbose_name = 'Проданная ночь'
+        verbose_name_plural = 'Проданные ночи'
+        indexes = [
+            # Загрузка и выручка по ночам и типам номеров читаются из индекса без обращения к таблице
+            models.Index(fields=['night', 'room_type', 'rate'], name='roomnight_night_type_idx'),
+            # Ночи номера за период
+            models.Index(fields=['room', 'night'], name='roomnight_room_night_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.room_id}: {self.night} ({self.rate})"
+
+class RoomTypeMonthReport(models.Model):
+    """Показатели типа номера за закрытый месяц (кэш модуля reports)"""
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='+', verbose_name='Тип номера')
+    # Первый день месяца
+    month = models.DateField('Месяц')
+    rooms_available = models.PositiveIntegerField('Номеро-ночей в продаже', default=0)
+    rooms_sold = models.PositiveIntegerField('Продано номеро-ночей', default=0)
+    revenue = models.DecimalField('Выручка', max_digits=14, decimal_places=2, default=0)
+    computed_at = models.DateTimeField('Рассчитано', auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Отчет по типу номера за месяц'
+        verbose_name_plural = 'Отчеты по типам номеров за месяц'
+        unique_together = ('month', 'room_type')
     
     def __str__(self):
-        return f"{self.customer_name} - {self.room.room_number}"
\ No newline at end of file
+        return f"{self.room_type_id}: {self.month:%Y-%m}"
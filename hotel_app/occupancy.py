@@ -0,0 +1,129 @@
+"""Счетчики занятости номеров по типам"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Room, RoomTypeOccupancy
+
+
+def counters_enabled():
+    """Читать ли панель управления номерами из денормализованных счетчиков"""
+    return getattr(settings, 'HOTEL_OCCUPANCY_COUNTERS', False)
+
+
+def aggregate_rows():
+    """Строки (room_type_id, всего, доступно) из группового COUNT по номерам"""
+    return Room.objects.values('room_type_id').annotate(
+        total=Count('id'),
+        available=Count('id', filter=Q(is_available=True)),
+    ).order_by().values_list('room_type_id', 'total', 'available')
+
+
+def counter_rows():
+    """Строки (room_type_id, всего, доступно) из денормализованных счетчиков"""
+    return RoomTypeOccupancy.objects.values_list('room_type_id', 'total_rooms', 'available_rooms')
+
+
+def aggregate_counts():
+    """Подсчитать номера по типам одним запросом: {room_type_id: (всего, доступно)}"""
+    return {room_type_id: (total, available) for room_type_id, total, available in aggregate_rows()}
+
+
+def counter_counts():
+    """Прочитать денормализованные счетчики одним запросом: {room_type_id: (всего, доступно)}"""
+    return {room_type_id: (total, available) for room_type_id, total, available in counter_rows()}
+
+
+def occupancy_counts():
+    """Счетчики для панели управления номерами из выбранного источника"""
+    return counter_counts() if counters_enabled() else aggregate_counts()
+
+
+async def aoccupancy_counts():
+    """Асинхронный вариант occupancy_counts()"""
+    rows = counter_rows() if counters_enabled() else aggregate_rows()
+    return {room_type_id: (total, available) async for room_type_id, total, available in rows}
+
+
+def record_availability_change(room, is_available):
+    """Атомарно сдвинуть счетчик доступных номеров после смены статуса номера"""
+    delta = 1 if is_available else -1
+    RoomTypeOccupancy.objects.filter(room_type_id=room.room_type_id).update(
+        available_rooms=F('available_rooms') + delta
+    )
+
+
+def shift_counters(before, after):
+    """Сдвинуть счетчики после правки номера; before и after - пары (room_type_id, is_available).
+
+    Если счетчика нового типа номера еще нет, счетчики пересчитываются целиком.
+    """
+    deltas = {}
+    for (room_type_id, is_available), sign in ((before, -1), (after, 1)):
+        total, available = deltas.get(room_type_id, (0, 0))
+        deltas[room_type_id] = (total + sign, available + sign * int(is_available))
+    with transaction.atomic():
+        for room_type_id, (total, available) in deltas.items():
+            if (total, available) == (0, 0):
+                continue
+            updated = RoomTypeOccupancy.objects.filter(room_type_id=room_type_id).update(
+                total_rooms=F('total_rooms') + total,
+                available_rooms=F('available_rooms') + available,
+            )
+            if not updated:
+                rebuild_counters()
+                return
+
+
+def set_room_availability(room, is_available):
+    """Установить is_available номера и сдвинуть счетчик; вернуть True, если флаг изменился.
+
+    UPDATE выполняется только при противоположном значении флага в базе,
+    поэтому из одновременных запросов с одним и тем же результатом строку
+    меняет и счетчик сдвигает ровно один. Сигналы не отправляются: версию
+    ROOM_STATUS увеличивает вызывающий код.
+    """
+    with transaction.atomic():
+        changed = Room.objects.filter(pk=room.pk, is_available=not is_available).update(
+            is_available=is_available
+        ) == 1
+        if changed:
+            record_availability_change(room, is_available)
+    room.is_available = is_available
+    return changed
+
+
+def rebuild_counters():
+    """Пересчитать все счетчики с нуля.
+
+    Возвращает список расхождений (room_type_id, было, стало), где
+    было и стало - пары (всего, доступно); отсутствующий счетчик - None.
+    """
+    with transaction.atomic():
+        actual = aggregate_counts()
+        stored = {
+            row.room_type_id: row
+            for row in RoomTypeOccupancy.objects.select_for_update()
+        }
+        drift = []
+        to_create, to_update = [], []
+        for room_type_id, (total, available) in actual.items():
+            row = stored.pop(room_type_id, None)
+            if row is None:
+                drift.append((room_type_id, None, (total, available)))
+                to_create.append(RoomTypeOccupancy(
+                    room_type_id=room_type_id, total_rooms=total, available_rooms=available
+                ))
+            elif (row.total_rooms, row.available_rooms) != (total, available):
+                drift.append((room_type_id, (row.total_rooms, row.available_rooms), (total, available)))
+                row.total_rooms, row.available_rooms = total, available
+                to_update.append(row)
+        # Типы номеров без номеров: счетчики должны быть нулевыми
+        for room_type_id, row in stored.items():
+            if (row.total_rooms, row.available_rooms) != (0, 0):
+                drift.append((room_type_id, (row.total_rooms, row.available_rooms), (0, 0)))
+                row.total_rooms, row.available_rooms = 0, 0
+                to_update.append(row)
+        RoomTypeOccupancy.objects.bulk_create(to_create)
+        RoomTypeOccupancy.objects.bulk_update(to_update, ['total_rooms', 'available_rooms'])
+    return drift
@@ -0,0 +1,97 @@
+"""Постраничный вывод по ключу (keyset) для длинных списков"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(booking_date, pk):
+    """Закодировать позицию (booking_date, id) в строку для URL"""
+    raw = f'{booking_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Разобрать строку позиции; None, если строка повреждена"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        value, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(value), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """Страница списка, упорядоченного по убыванию (booking_date, id).
+
+    Вместо OFFSET используется условие по последней показанной позиции,
+    поэтому стоимость страницы не зависит от ее номера и длины истории.
+    """
+
+    def __init__(self, queryset, page_size, after=None, before=None):
+        self._prepare(queryset, page_size, after, before)
+        self._paginate(list(self._queryset))
+
+    @classmethod
+    async def acreate(cls, queryset, page_size, after=None, before=None):
+        """Асинхронный вариант конструктора (асинхронный ORM)"""
+        page = cls.__new__(cls)
+        page._prepare(queryset, page_size, after, before)
+        page._paginate([row async for row in page._queryset])
+        return page
+
+    def _prepare(self, queryset, page_size, after, before):
+        """Построить запрос страницы (page_size + 1 строк, чтобы узнать о следующей)"""
+        self.page_size = page_size
+        self._after = decode_cursor(after)
+        self._before = decode_cursor(before) if self._after is None else None
+
+        if self._before is not None:
+            # Предыдущая страница: идем в обратном порядке и разворачиваем результат
+            booking_date, pk = self._before
+            self._queryset = queryset.filter(
+                Q(booking_date__gt=booking_date) | Q(booking_date=booking_date, id__gt=pk)
+            ).order_by('booking_date', 'id')[:page_size + 1]
+        else:
+            if self._after is not None:
+                booking_date, pk = self._after
+                queryset = queryset.filter(
+                    Q(booking_date__lt=booking_date) | Q(booking_date=booking_date, id__lt=pk)
+                )
+            self._queryset = queryset.order_by('-booking_date', '-id')[:page_size + 1]
+
+    def _paginate(self, rows):
+        page_size = self.page_size
+        if self._before is not None:
+            self.has_previous = len(rows) > page_size
+            self.object_list = rows[:page_size][::-1]
+            self.has_next = True
+        else:
+            self.has_next = len(rows) > page_size
+            self.object_list = rows[:page_size]
+            self.has_previous = self._after is not None
+
+        if not self.object_list:
+            self.has_next = self.has_previous = False
+
+    @property
+    def next_cursor(self):
+        if self.has_next:
+            last = self.object_list[-1]
+            return encode_cursor(last.booking_date, last.pk)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous:
+            first = self.object_list[0]
+            return encode_cursor(first.booking_date, first.pk)
+        return None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
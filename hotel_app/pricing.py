@@ -0,0 +1,81 @@
+"""Расчет стоимости проживания по недельной таблице цен"""
+from decimal import Decimal
+
+from .reference_cache import reference_data
+
+ZERO = Decimal('0.00')
+
+
+class WeeklyPriceTable:
+    """Цены за ночь на каждый день недели (0=Понедельник, 6=Воскресенье) для одного типа номера.
+
+    Стоимость любого периода считается за O(1): целые недели умножаются
+    на недельную сумму, остаток берется из префиксных сумм по двум неделям.
+    """
+
+    def __init__(self, rates):
+        self.rates = tuple(Decimal(rate) for rate in rates)
+        if len(self.rates) != 7:
+            raise ValueError('Таблица цен должна содержать 7 дней недели')
+        self.week_total = sum(self.rates, ZERO)
+        self._prefix = [ZERO]
+        for rate in self.rates * 2:
+            self._prefix.append(self._prefix[-1] + rate)
+
+    @classmethod
+    def from_prices(cls, prices, default_rate):
+        """Построить таблицу из пар (day_of_week, price); пропущенные дни берут default_rate"""
+        rates = [Decimal(default_rate)] * 7
+        for day_of_week, price in prices:
+            rates[day_of_week] = price
+        return cls(rates)
+
+    def rate_for(self, day):
+        """Цена ночи, начинающейся в дату day"""
+        return self.rates[day.weekday()]
+
+    def stay_price(self, check_in_date, check_out_date):
+        """Стоимость ночей периода [check_in_date, check_out_date)"""
+        nights = (check_out_date - check_in_date).days
+        if nights <= 0:
+            return ZERO
+        weeks, rest = divmod(nights, 7)
+        start = check_in_date.weekday()
+        return self.week_total * weeks + self._prefix[start + rest] - self._prefix[start]
+
+
+def price_table_for_room(room):
+    """Таблица цен типа номера из кэша справочных данных; цена номера - значение по умолчанию"""
+    prices = reference_data().prices.get(room.room_type_id, ())
+    return WeeklyPriceTable.from_prices(prices, room.price_per_night)
+
+
+def stay_price(room, check_in_date, check_out_date):
+    """Стоимость проживания в номере room за период [check_in_date, check_out_date)"""
+    return price_table_for_room(room).stay_price(check_in_date, check_out_date)
+
+
+def price_tables(room_types):
+    """Таблицы цен для нескольких типов номеров: {room_type_id: WeeklyPriceTable}.
+
+    room_types - объекты с атрибутом id или сами id. Если для какого-то
+    дня недели цена не задана, используется минимальная цена за ночь
+    номеров этого типа.
+    """
+    data = reference_data()
+    tables = {}
+    for room_type in room_types:
+        room_type_id = getattr(room_type, 'id', room_type)
+        tables[room_type_id] = WeeklyPriceTable.from_prices(
+            data.prices.get(room_type_id, ()),
+            data.min_room_rate.get(room_type_id) or ZERO,
+        )
+    return tables
+
+
+def quote(room_types, check_in_date, check_out_date):
+    """Стоимость периода для каждого типа номера: {room_type_id: Decimal}"""
+    return {
+        room_type_id: table.stay_price(check_in_date, check_out_date)
+        for room_type_id, table in price_tables(room_types).items()
+    }
@@ -0,0 +1,117 @@
+"""Сверка флага Room.is_available с бронированиями.
+
+Несоответствия находятся одним запросом с подзапросом EXISTS по индексу
+(room, check_in_date, check_out_date), а исправляются одним bulk_update
+в транзакции, поэтому блокировка записи SQLite удерживается только на
+время самого исправления, а не на время обхода всех номеров.
+"""
+import time
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Value, When
+from django.utils import timezone
+
+from .allocation import active_bookings, occupied_on
+from .models import Room, RoomTypeOccupancy
+from .occupancy import rebuild_counters
+from .versioning import ROOM_STATUS, bump_version
+
+BATCH_SIZE = 500
+
+
+def mismatched_rooms(on_date=None):
+    """Номера, у которых is_available не соответствует бронированиям на дату (один запрос).
+
+    Номер должен быть свободен тогда и только тогда, когда его не
+    занимает ни одно активное бронирование.
+    """
+    occupied = Exists(active_bookings().filter(occupied_on(on_date), room=OuterRef('pk')))
+    return Room.objects.annotate(occupied=occupied).filter(
+        Q(is_available=True, occupied=True) | Q(is_available=False, occupied=False)
+    ).only('id', 'room_number', 'room_type_id', 'is_available').order_by('room_number')
+
+
+def refresh_availability(room_ids, on_date=None):
+    """Пересчитать is_available номеров room_ids по бронированиям; вернуть изменившиеся номера.
+
+    Несоответствия находятся одним запросом, флаги меняются одним UPDATE,
+    счетчики занятости сдвигаются на разницу по каждому типу номера.
+    Сигналы не отправляются: версию ROOM_STATUS увеличивает вызывающий код.
+    """
+    rooms = list(mismatched_rooms(on_date).filter(pk__in=room_ids))
+    if not rooms:
+        return rooms
+    Room.objects.filter(pk__in=[room.pk for room in rooms]).update(
+        is_available=Case(When(is_available=True, then=Value(False)), default=Value(True))
+    )
+    deltas = Counter()
+    for room in rooms:
+        deltas[room.room_type_id] += -1 if room.is_available else 1
+        room.is_available = not room.is_available
+    for room_type_id, delta in deltas.items():
+        if delta:
+            RoomTypeOccupancy.objects.filter(room_type_id=room_type_id).update(
+                available_rooms=F('available_rooms') + delta
+            )
+    return rooms
+
+
+class ReconciliationReport:
+    """Результат сверки: несоответствия, число исправленных номеров и время этапов"""
+
+    def __init__(self, on_date, dry_run):
+        self.on_date = on_date
+        self.dry_run = dry_run
+        self.mismatches = []
+        self.fixed = 0
+        self.timings_ms = {}
+
+    def as_dict(self):
+        return {
+            'date': self.on_date.isoformat(),
+            'dry_run': self.dry_run,
+            'mismatches': [
+                {
+                    'room_id': room_id,
+                    'room_number': room_number,
+                    'is_available': is_available,
+                    'should_be_available': not is_available,
+                }
+                for room_id, room_number, is_available in self.mismatches
+            ],
+            'fixed': self.fixed,
+            'timings_ms': self.timings_ms,
+        }
+
+
+def reconcile(dry_run=True, on_date=None):
+    """Найти и (если не dry_run) исправить несоответствия статуса номеров.
+
+    Поиск и исправление выполняются в одной транзакции, чтобы между ними
+    статус номера не изменился. bulk_update не отправляет сигналы, поэтому
+    счетчики занятости и версия ROOM_STATUS обновляются здесь же.
+    """
+    on_date = on_date or timezone.localdate()
+    report = ReconciliationReport(on_date, dry_run)
+    started = time.perf_counter()
+
+    with transaction.atomic():
+        rooms = list(mismatched_rooms(on_date))
+        found = time.perf_counter()
+        report.timings_ms['find'] = round((found - started) * 1000, 3)
+        report.mismatches = [(room.id, room.room_number, room.is_available) for room in rooms]
+
+        if rooms and not dry_run:
+            for room in rooms:
+                room.is_available = not room.is_available
+            Room.objects.bulk_update(rooms, ['is_available'], batch_size=BATCH_SIZE)
+            # Флаг мог измениться в обход приложения, тогда и счетчики неверны:
+            # пересчитать их одним агрегирующим запросом
+            rebuild_counters()
+            bump_version(ROOM_STATUS)
+            report.fixed = len(rooms)
+            report.timings_ms['fix'] = round((time.perf_counter() - found) * 1000, 3)
+
+    report.timings_ms['total'] = round((time.perf_counter() - started) * 1000, 3)
+    return report
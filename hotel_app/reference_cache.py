@@ -0,0 +1,125 @@
+"""Кэш справочных данных (типы номеров, цены, каталог номеров) в памяти процесса.
+
+Справочные таблицы меняются несколько раз в месяц, поэтому они хранятся
+в памяти в компактном виде. Снимок помечен версией из DataVersion:
+запись в Price, RoomType или Room (сигналы post_save/post_delete)
+увеличивает версию в базе и сбрасывает локальный снимок, а остальные
+рабочие процессы замечают новую версию при очередной проверке.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+from .models import Price, Room, RoomType
+from .versioning import REFERENCE, current_version
+
+RoomTypeInfo = namedtuple('RoomTypeInfo', 'id name description')
+RoomInfo = namedtuple(
+    'RoomInfo',
+    'id room_number room_type_id category capacity has_baby_bed price_per_night',
+)
+
+
+class ReferenceData:
+    """Неизменяемый снимок справочных таблиц"""
+
+    def __init__(self, version, room_types, rooms, prices):
+        self.version = version
+        # Типы номеров в порядке id
+        self.room_types = tuple(room_types)
+        # Номера в порядке room_number
+        self.rooms = tuple(rooms)
+        # {room_type_id: ((day_of_week, price), ...)}
+        self.prices = prices
+        self.room_types_by_id = {room_type.id: room_type for room_type in self.room_types}
+        self.min_room_rate = {}
+        for room in self.rooms:
+            rate = self.min_room_rate.get(room.room_type_id)
+            if rate is None or room.price_per_night < rate:
+                self.min_room_rate[room.room_type_id] = room.price_per_night
+
+    @classmethod
+    def load(cls, version):
+        """Прочитать справочные таблицы из базы данных (три запроса)"""
+        room_types = [
+            RoomTypeInfo(*row)
+            for row in RoomType.objects.order_by('id').values_list('id', 'name', 'description')
+        ]
+        rooms = [
+            RoomInfo(*row)
+            for row in Room.objects.order_by('room_number').values_list(*RoomInfo._fields)
+        ]
+        prices = {}
+        for room_type_id, day_of_week, price in Price.objects.order_by(
+            'room_type_id', 'day_of_week'
+        ).values_list('room_type_id', 'day_of_week', 'price'):
+            prices.setdefault(room_type_id, []).append((day_of_week, price))
+        return cls(
+            version,
+            room_types,
+            rooms,
+            {room_type_id: tuple(rows) for room_type_id, rows in prices.items()},
+        )
+
+
+class ReferenceCache:
+    """Снимок справочных данных в памяти процесса со счетчиками попаданий и промахов"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def check_interval(self):
+        """Как часто (в секундах) сверять версию снимка с базой данных"""
+        return getattr(settings, 'HOTEL_REFERENCE_CACHE_CHECK_INTERVAL', 2.0)
+
+    def get(self):
+        """Актуальный снимок справочных данных"""
+        data = self._data
+        now = time.monotonic()
+        if data is not None and now - self._checked_at < self.check_interval:
+            self.hits += 1
+            return data
+
+        version = current_version(REFERENCE)
+        with self._lock:
+            data = self._data
+            if data is not None and data.version == version:
+                self._checked_at = now
+                self.hits += 1
+                return data
+            data = ReferenceData.load(version)
+            self._data = data
+            self._checked_at = now
+            self.misses += 1
+            return data
+
+    def invalidate(self):
+        """Сбросить снимок; следующее обращение перечитает таблицы"""
+        with self._lock:
+            self._data = None
+
+    def stats(self):
+        """Счетчики кэша для мониторинга"""
+        data = self._data
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'version': data.version if data is not None else None,
+            'room_types': len(data.room_types) if data is not None else 0,
+            'rooms': len(data.rooms) if data is not None else 0,
+        }
+
+
+reference_cache = ReferenceCache()
+
+
+def reference_data():
+    """Снимок справочных данных текущего процесса"""
+    return reference_cache.get()
@@ -0,0 +1,224 @@
+"""Отчеты о загрузке и выручке по типам номеров.
+
+Показатели периода:
+
+* загрузка (occupancy) - доля проданных номеро-ночей среди доступных;
+* ADR (average daily rate) - средняя цена проданной номеро-ночи;
+* RevPAR (revenue per available room) - выручка на доступную номеро-ночь.
+
+Проданные ночи и выручка берутся из журнала проданных ночей (ledger),
+где total_price бронирования уже разделен по ночам проживания, и
+суммируются в SQL одним GROUP BY на период. Доступные номеро-ночи -
+количество номеров типа, умноженное на число дней периода.
+
+Длинный диапазон делится на месяцы. Месяцы считаются параллельно в
+пуле процессов (у SQLite в памяти и внутри транзакции - последовательно,
+потому что другие процессы эти данные не видят), а результаты закрытых
+месяцев сохраняются в RoomTypeMonthReport и больше не пересчитываются.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, connections, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .ledger import nights_between
+from .models import RoomTypeMonthReport
+from .occupancy import aggregate_counts
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+class PeriodMetrics:
+    """Загрузка, ADR и RevPAR одного типа номера (или всех, room_type_id=None) за период [start, end)"""
+
+    def __init__(self, start, end, room_type_id, rooms_available, rooms_sold, revenue):
+        self.start = start
+        self.end = end
+        self.room_type_id = room_type_id
+        self.rooms_available = rooms_available
+        self.rooms_sold = rooms_sold
+        self.revenue = Decimal(revenue or 0).quantize(CENT)
+
+    @property
+    def occupancy(self):
+        return self.rooms_sold / self.rooms_available if self.rooms_available else 0.0
+
+    @property
+    def adr(self):
+        return (self.revenue / self.rooms_sold).quantize(CENT) if self.rooms_sold else ZERO
+
+    @property
+    def revpar(self):
+        return (self.revenue / self.rooms_available).quantize(CENT) if self.rooms_available else ZERO
+
+    def as_dict(self):
+        return {
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'room_type_id': self.room_type_id,
+            'rooms_available': self.rooms_available,
+            'rooms_sold': self.rooms_sold,
+            'revenue': str(self.revenue),
+            'occupancy': round(self.occupancy, 4),
+            'adr': str(self.adr),
+            'revpar': str(self.revpar),
+        }
+
+
+def next_month(day):
+    """Первый день месяца, следующего за месяцем day"""
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def month_periods(start, end):
+    """Разбить [start, end) на периоды по границам месяцев"""
+    periods = []
+    current = start
+    while current < end:
+        period_end = min(next_month(current), end)
+        periods.append((current, period_end))
+        current = period_end
+    return periods
+
+
+def is_closed_month(start, end, today):
+    """Период - целый месяц, закончившийся до сегодняшнего дня"""
+    return start.day == 1 and end == next_month(start) and end <= today
+
+
+def sold_rows(start, end):
+    """Строки (room_type_id, продано номеро-ночей, выручка) за период, один запрос"""
+    return list(nights_between(start, end).values('room_type_id').annotate(
+        rooms=Count('id'), revenue=Sum('rate'),
+    ).order_by('room_type_id').values_list('room_type_id', 'rooms', 'revenue'))
+
+
+def compute_period(start, end):
+    """Рассчитать один период; выполняется и в рабочих процессах пула"""
+    return start, end, sold_rows(start, end)
+
+
+def init_worker():
+    """Подготовить Django в рабочем процессе (нужно при запуске процессов через spawn)"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def can_use_processes():
+    """Видят ли другие процессы те же данные, что и текущее соединение"""
+    if connection.in_atomic_block:
+        return False
+    return not (connection.vendor == 'sqlite' and connection.is_in_memory_db())
+
+
+def compute_periods(periods, workers=None):
+    """Рассчитать периоды в пуле процессов или последовательно; вернуть [(start, end, rows)]"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(periods))
+    if workers <= 1 or not can_use_processes():
+        return [compute_period(start, end) for start, end in periods]
+
+    # Дочерние процессы не должны наследовать открытые соединения с базой данных
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        return list(pool.map(compute_period, *zip(*periods)))
+
+
+def period_metrics(start, end, rows, inventory):
+    """Показатели периода по всем типам номеров из строк sold_rows"""
+    days = (end - start).days
+    sold = {room_type_id: (rooms, revenue) for room_type_id, rooms, revenue in rows}
+    return [
+        PeriodMetrics(start, end, room_type_id, inventory.get(room_type_id, 0) * days, *sold.get(room_type_id, (0, ZERO)))
+        for room_type_id in sorted(set(inventory) | set(sold))
+    ]
+
+
+def cached_months(periods, today):
+    """Сохраненные показатели закрытых месяцев: {первый день месяца: [PeriodMetrics]}"""
+    months = [start for start, end in periods if is_closed_month(start, end, today)]
+    cached = {}
+    for row in RoomTypeMonthReport.objects.filter(month__in=months).order_by('month', 'room_type_id'):
+        cached.setdefault(row.month, []).append(PeriodMetrics(
+            row.month, next_month(row.month), row.room_type_id, row.rooms_available, row.rooms_sold, row.revenue,
+        ))
+    return cached
+
+
+def store_months(metrics):
+    """Сохранить показатели закрытых месяцев (прежние строки этих месяцев заменяются)"""
+    if not metrics:
+        return
+    with transaction.atomic():
+        RoomTypeMonthReport.objects.filter(month__in={item.start for item in metrics}).delete()
+        RoomTypeMonthReport.objects.bulk_create([
+            RoomTypeMonthReport(
+                room_type_id=item.room_type_id,
+                month=item.start,
+                rooms_available=item.rooms_available,
+                rooms_sold=item.rooms_sold,
+                revenue=item.revenue,
+            )
+            for item in metrics
+        ])
+
+
+def room_type_report(start, end, workers=None, refresh=False, today=None):
+    """Показатели по типам номеров и месяцам периода [start, end).
+
+    Закрытые месяцы читаются из кэша (refresh=True пересчитывает их);
+    остальные считаются в пуле из workers процессов (по умолчанию по
+    числу процессоров). Количество номеров берется текущее: оно
+    фиксируется в кэше в момент расчета закрытого месяца.
+    """
+    today = today or timezone.localdate()
+    periods = month_periods(start, end)
+    cached = {} if refresh else cached_months(periods, today)
+    missing = [period for period in periods if period[0] not in cached]
+
+    computed = {}
+    if missing:
+        inventory = {room_type_id: total for room_type_id, (total, available) in aggregate_counts().items()}
+        for period_start, period_end, rows in compute_periods(missing, workers):
+            computed[period_start] = period_metrics(period_start, period_end, rows, inventory)
+        store_months([
+            item
+            for (period_start, period_end) in missing if is_closed_month(period_start, period_end, today)
+            for item in computed[period_start]
+        ])
+
+    metrics = []
+    for period_start, period_end in periods:
+        metrics.extend(computed.get(period_start) or cached.get(period_start, []))
+    return metrics
+
+
+def totals(metrics, by_room_type=True):
+    """Сложить показатели периодов: {room_type_id: PeriodMetrics} или одна сводка по всем типам"""
+    combined = {}
+    for item in metrics:
+        key = item.room_type_id if by_room_type else None
+        total = combined.get(key)
+        if total is None:
+            combined[key] = PeriodMetrics(item.start, item.end, key, item.rooms_available, item.rooms_sold, item.revenue)
+        else:
+            total.start, total.end = min(total.start, item.start), max(total.end, item.end)
+            total.rooms_available += item.rooms_available
+            total.rooms_sold += item.rooms_sold
+            total.revenue += item.revenue
+    return combined if by_room_type else combined.get(None)
+
+
+def default_period(today=None):
+    """Последние двенадцать закрытых месяцев и текущий месяц"""
+    today = today or timezone.localdate()
+    return date(today.year - 1, today.month, 1), next_month(today)
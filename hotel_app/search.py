@@ -0,0 +1,255 @@
+"""Быстрый поиск гостей по имени и телефону.
+
+Телефон хранится в том виде, в каком его ввели (+7(999)123-45-67), и
+поиск по icontains просматривает всю таблицу. Поэтому у бронирования есть
+два производных столбца с индексами:
+
+* phone_digits - только цифры телефона (российский номер с 8 в начале
+  приводится к 7);
+* name_key - имя в нижнем регистре, ё заменена на е, пробелы одиночные.
+
+Поиск по началу значения выполняется как диапазон [prefix, prefix +
+PREFIX_END) по индексу, поэтому не зависит от LIKE и правил сравнения
+регистра в базе данных. Столбцы заполняются сигналом pre_save (signals);
+bulk_create должен заполнять их сам (fill_search_keys).
+
+На SQLite с FTS5 name_key дополнительно входит в полнотекстовый индекс
+hotel_app_booking_fts (внешнее содержимое, триггеры на таблице
+бронирований): он находит бронирование по началу любого слова, то есть и
+по фамилии, и по имени. Без FTS5 и на других базах данных имя ищется по
+началу name_key.
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import OperationalError, connection
+from django.db.models import Q
+
+from .models import Booking, Room
+
+# Больше любого символа: верхняя граница диапазона значений с общим началом
+PREFIX_END = '\U0010ffff'
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+# Кандидатов на один результат: у постоянного гостя много бронирований
+CANDIDATES_PER_RESULT = 5
+MIN_QUERY_LENGTH = 2
+MIN_PHONE_DIGITS = 3
+
+NON_DIGITS = re.compile(r'\D+')
+PHONE_QUERY = re.compile(r'^[\d\s+().-]+$')
+WORD = re.compile(r'\w+')
+
+FTS_TABLE = 'hotel_app_booking_fts'
+FTS_TRIGGERS = ('hotel_app_booking_fts_ai', 'hotel_app_booking_fts_ad', 'hotel_app_booking_fts_au')
+FTS_SCHEMA = (
+    # Индексы префиксов из 1-3 символов ускоряют поиск по первым буквам
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name_key, content='hotel_app_booking', content_rowid='id', prefix='1 2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS hotel_app_booking_fts_ai AFTER INSERT ON hotel_app_booking BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name_key) VALUES (new.id, new.name_key);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS hotel_app_booking_fts_ad AFTER DELETE ON hotel_app_booking BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name_key) VALUES ('delete', old.id, old.name_key);
+    END""",
+    # Сохранение бронирования записывает все столбцы: индекс меняется, только если имя изменилось
+    f"""CREATE TRIGGER IF NOT EXISTS hotel_app_booking_fts_au AFTER UPDATE OF name_key ON hotel_app_booking
+    WHEN old.name_key IS NOT new.name_key BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name_key) VALUES ('delete', old.id, old.name_key);
+        INSERT INTO {FTS_TABLE}(rowid, name_key) VALUES (new.id, new.name_key);
+    END""",
+)
+
+# Есть ли полнотекстовый индекс: {имя базы данных: bool}
+_fts_state = {}
+
+
+def normalize_phone(value, prefix=False):
+    """Цифры телефона; 8 в начале российского номера заменяется на 7.
+
+    prefix=True - начало номера, набранное в строке поиска: 8 заменяется
+    независимо от длины.
+    """
+    digits = NON_DIGITS.sub('', value or '')
+    if digits.startswith('8') and (len(digits) == 11 or prefix and len(digits) < 11):
+        digits = '7' + digits[1:]
+    return digits
+
+
+def name_key(value):
+    """Имя для поиска: нижний регистр, ё -> е, одиночные пробелы"""
+    return ' '.join((value or '').lower().replace('ё', 'е').split())[:100]
+
+
+def fill_search_keys(booking):
+    """Заполнить столбцы поиска бронирования; вернуть его же"""
+    booking.phone_digits = normalize_phone(booking.customer_phone)
+    booking.name_key = name_key(booking.customer_name)
+    return booking
+
+
+def prefix_range(field, prefix):
+    """Условие «значение field начинается с prefix» в виде диапазона по индексу"""
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + PREFIX_END})
+
+
+def is_phone_query(query):
+    return bool(PHONE_QUERY.match(query)) and len(normalize_phone(query, prefix=True)) >= MIN_PHONE_DIGITS
+
+
+def search_condition(query):
+    """Условие поиска бронирований по началу телефона, имени или по номеру комнаты (без FTS)"""
+    query = query.strip()
+    if is_phone_query(query):
+        condition = prefix_range('phone_digits', normalize_phone(query, prefix=True))
+    else:
+        condition = prefix_range('name_key', name_key(query))
+    # Подзапрос вместо JOIN, чтобы база данных могла объединить поиски по индексам (OR)
+    return condition | Q(room_id__in=Room.objects.filter(room_number=query).values('id'))
+
+
+def install_booking_fts(using=None):
+    """Создать полнотекстовый индекс имен и триггеры, если их нет (только SQLite с FTS5).
+
+    Вызывается после каждого migrate (signals); миграция 0012 создает
+    индекс по своей копии FTS_SCHEMA. Если триггеры пришлось создать
+    заново, индекс перестраивается. Возвращает True, если индекс доступен.
+    """
+    db = using or connection
+    if db.vendor != 'sqlite':
+        return False
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)", [FTS_TABLE, *FTS_TRIGGERS]
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if len(existing) < len(FTS_TRIGGERS) + 1:
+            try:
+                for statement in FTS_SCHEMA:
+                    cursor.execute(statement)
+            except OperationalError:
+                # SQLite собран без FTS5
+                _fts_state.pop(db.settings_dict['NAME'], None)
+                return False
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    _fts_state[db.settings_dict['NAME']] = True
+    return True
+
+
+def drop_booking_fts(using=None):
+    """Удалить полнотекстовый индекс имен и его триггеры"""
+    db = using or connection
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        for trigger in FTS_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    _fts_state.pop(db.settings_dict['NAME'], None)
+
+
+@contextmanager
+def fts_suspended():
+    """Удалить полнотекстовый индекс на время массовой загрузки или удаления бронирований.
+
+    Триггеры втрое замедляют вставку, а однократная перестройка индекса
+    после загрузки обходится дешевле. Если внутри блока произошла ошибка,
+    индекс не восстанавливается: его удаление откатится вместе с транзакцией.
+    """
+    installed = fts_available()
+    if installed:
+        drop_booking_fts()
+    yield
+    if installed:
+        install_booking_fts()
+
+
+def fts_available():
+    """Есть ли полнотекстовый индекс имен (проверяется один раз на базу данных)"""
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _fts_state:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE name IN (%s, %s, %s, %s)", [FTS_TABLE, *FTS_TRIGGERS]
+            )
+            _fts_state[name] = cursor.fetchone()[0] == len(FTS_TRIGGERS) + 1
+    return _fts_state[name]
+
+
+def fts_match_ids(words, limit):
+    """id бронирований, у которых каждое из words - начало какого-либо слова имени; сначала новые"""
+    expression = ' '.join(f'"{word}"*' for word in words)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rowid DESC LIMIT %s',
+            [expression, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def candidate_ids(query, limit):
+    """id бронирований, подходящих под строку поиска, в порядке показа"""
+    if is_phone_query(query):
+        digits = normalize_phone(query, prefix=True)
+        return list(
+            Booking.objects.filter(prefix_range('phone_digits', digits))
+            .order_by('phone_digits').values_list('id', flat=True)[:limit]
+        )
+    key = name_key(query)
+    words = WORD.findall(key)
+    if not words:
+        return []
+    if fts_available():
+        return fts_match_ids(words, limit)
+    return list(
+        Booking.objects.filter(prefix_range('name_key', key))
+        .order_by('name_key').values_list('id', flat=True)[:limit]
+    )
+
+
+def search_guests(query, limit=SEARCH_LIMIT):
+    """Гости, подходящие под строку поиска (начало телефона или слов имени), для подсказок.
+
+    Один результат на гостя (имя и телефон) с его бронированием, найденным
+    первым; не больше limit результатов, два запроса.
+    """
+    query = (query or '').strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        return []
+    ids = candidate_ids(query, limit * CANDIDATES_PER_RESULT)
+    if not ids:
+        return []
+    rows = {
+        row[0]: row
+        for row in Booking.objects.filter(pk__in=ids).values_list(
+            'id', 'customer_name', 'customer_phone', 'name_key', 'phone_digits',
+            'room__room_number', 'check_in_date', 'check_out_date', 'status', 'guest_id',
+        )
+    }
+    results = []
+    seen = set()
+    for booking_id in ids:
+        # Бронирование могли удалить между запросами
+        if booking_id not in rows:
+            continue
+        (booking_id, customer_name, customer_phone, key, digits,
+         room_number, check_in_date, check_out_date, status, guest_id) = rows[booking_id]
+        if (key, digits) in seen:
+            continue
+        seen.add((key, digits))
+        results.append({
+            'booking_id': booking_id,
+            'customer_name': customer_name,
+            'customer_phone': customer_phone,
+            'room_number': room_number,
+            'check_in_date': check_in_date.isoformat(),
+            'check_out_date': check_out_date.isoformat(),
+            'status': status,
+            'guest_id': guest_id,
+        })
+        if len(results) == limit:
+            break
+    return results
@@ -0,0 +1,159 @@
+"""Обработчики сигналов моделей"""
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from .guests import attach_guest
+from .ledger import sync_booking
+from .models import Booking, Price, Room, RoomNight, RoomType
+from .occupancy import rebuild_counters, shift_counters
+from .reference_cache import reference_cache
+from .search import fill_search_keys, install_booking_fts
+from .versioning import REFERENCE, ROOM_STATUS, bump_version
+
+# Поля номера, которые меняются при заезде и выезде и не входят в справочные данные
+ROOM_STATE_FIELDS = frozenset(['is_available'])
+# Поля, которые показывают панели и лента статуса номеров (версия ROOM_STATUS);
+# тип, цена и другие справочные поля номера входят в версию REFERENCE
+ROOM_STATUS_FIELDS = {
+    Booking: ('status', 'room_id', 'check_in_date', 'check_out_date', 'customer_name', 'customer_phone'),
+    Room: ('is_available', 'room_number'),
+}
+# Поля, значения которых в базе запоминаются перед сохранением (stored_values)
+TRACKED_FIELDS = {
+    Booking: ROOM_STATUS_FIELDS[Booking],
+    Room: ('room_type_id', 'is_available', 'room_number'),
+}
+
+
+@receiver([post_save, post_delete], sender=RoomType)
+@receiver([post_save, post_delete], sender=Price)
+@receiver([post_save, post_delete], sender=Room)
+def invalidate_reference_data(sender, update_fields=None, **kwargs):
+    """Увеличить версию справочных данных и сбросить кэш процесса"""
+    if sender is Room and update_fields and set(update_fields) <= ROOM_STATE_FIELDS:
+        return
+    bump_version(REFERENCE)
+    reference_cache.invalidate()
+
+
+@receiver(pre_save, sender=Booking)
+@receiver(pre_save, sender=Room)
+def remember_stored_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Запомнить значения отслеживаемых полей в базе до сохранения (одним запросом).
+
+    instance._stored_values - {поле: значение} сохраняемых отслеживаемых
+    полей или None, если прежние значения неизвестны (новая запись, загрузка
+    фикстур).
+    """
+    instance._stored_values = None
+    if raw or instance._state.adding:
+        return
+    fields = TRACKED_FIELDS[sender]
+    if update_fields is not None:
+        saved = {sender._meta.get_field(name).attname for name in update_fields}
+        fields = [field for field in fields if field in saved]
+        if not fields:
+            instance._stored_values = {}
+            return
+    instance._stored_values = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def changed(instance, fields):
+    """Изменилось ли при сохранении хотя бы одно из полей; None - прежние значения неизвестны"""
+    stored = getattr(instance, '_stored_values', None)
+    if stored is None:
+        return None
+    return any(getattr(instance, field) != stored[field] for field in fields if field in stored)
+
+
+@receiver(post_save, sender=Room)
+def refresh_occupancy_counters(sender, instance, created, raw=False, **kwargs):
+    """Учесть сохранение номера в счетчиках занятости.
+
+    Правка номера сдвигает счетчики через F()-выражения на разницу типа и
+    доступности до и после сохранения. Добавление номера и загрузка
+    фикстур редки, поэтому счетчики пересчитываются целиком.
+    """
+    if created or raw:
+        rebuild_counters()
+    elif changed(instance, ('room_type_id', 'is_available')):
+        stored = instance._stored_values
+        shift_counters(
+            (stored.get('room_type_id', instance.room_type_id), stored.get('is_available', instance.is_available)),
+            (instance.room_type_id, instance.is_available),
+        )
+
+
+@receiver(post_delete, sender=Room)
+def rebuild_occupancy_counters(sender, **kwargs):
+    """Пересчитать счетчики занятости после удаления номера"""
+    rebuild_counters()
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=Room)
+def bump_room_status_version(sender, instance, created, raw=False, **kwargs):
+    """Отметить изменение состояния номеров, если изменились поля, видимые на панелях.
+
+    Строка версии общая для всех записей, поэтому сохранения, не меняющие
+    ROOM_STATUS_FIELDS (повторное сохранение, привязка гостя, смена цены
+    номера), ее не увеличивают.
+    """
+    if created or raw or changed(instance, ROOM_STATUS_FIELDS[sender]) is not False:
+        bump_version(ROOM_STATUS)
+
+
+@receiver(post_delete, sender=Booking)
+@receiver(post_delete, sender=Room)
+def bump_room_status_version_on_delete(sender, **kwargs):
+    """Отметить удаление бронирования или номера"""
+    bump_version(ROOM_STATUS)
+
+
+@receiver(pre_save, sender=Booking)
+def update_search_keys(sender, instance, raw=False, **kwargs):
+    """Заполнить столбцы поиска гостя по имени и телефону"""
+    fill_search_keys(instance)
+
+
+@receiver(pre_save, sender=Booking)
+def link_guest(sender, instance, raw=False, **kwargs):
+    """Привязать новое бронирование к профилю гостя"""
+    if raw:
+        return
+    attach_guest(instance)
+
+
+@receiver(post_save, sender=Booking)
+def sync_room_nights(sender, instance, created, raw=False, **kwargs):
+    """Обновить ночи бронирования в журнале проданных ночей в той же транзакции"""
+    if raw:
+        return
+    sync_booking(instance, created=created)
+
+
+@receiver(post_save, sender=Room)
+def sync_room_night_types(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Перенести ночи номера в журнале на новый тип номера"""
+    if created or raw or (update_fields and set(update_fields) <= ROOM_STATE_FIELDS):
+        return
+    RoomNight.objects.filter(room=instance).exclude(room_type_id=instance.room_type_id).update(
+        room_type_id=instance.room_type_id
+    )
+
+
+@receiver(post_migrate)
+def restore_booking_fts(sender, using, **kwargs):
+    """Восстановить полнотекстовый индекс имен после migrate.
+
+    SQLite пересоздает таблицу бронирований при части изменений схемы, и ее
+    триггеры удаляются вместе со старой таблицей.
+    """
+    if sender.name != 'hotel_app':
+        return
+    connection = connections[using]
+    # До миграции 0012 в таблице нет столбца name_key
+    if ('hotel_app', '0012_booking_search_keys') in MigrationRecorder(connection).applied_migrations():
+        install_booking_fts(connection)
@@ -0,0 +1,198 @@
+"""Генератор синтетических данных для нагрузочных испытаний.
+
+Данные вставляются пачками через bulk_create, поэтому 10 000 номеров и
+миллион бронирований создаются за минуты, а не часы. Генерация
+детерминирована: одинаковый seed дает одинаковый набор данных.
+"""
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Booking, Guest, Price, Room, RoomNight, RoomType
+from .guests import backfill_guests
+from .ledger import rebuild_ledger
+from .occupancy import rebuild_counters
+from .pricing import WeeklyPriceTable
+from .reference_cache import reference_cache
+from .search import fill_search_keys, fts_suspended
+from .versioning import REFERENCE, ROOM_STATUS, bump_version
+
+FIRST_NAMES = ['Иван', 'Петр', 'Сергей', 'Анна', 'Мария', 'Елена', 'Алексей', 'Ольга', 'Дмитрий', 'Наталья']
+LAST_NAMES = ['Иванов', 'Петров', 'Сидоров', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов', 'Лебедев', 'Козлов', 'Новиков']
+CATEGORIES = [('single', 1), ('double', 2), ('triple', 3)]
+
+
+@contextmanager
+def explicit_booking_date():
+    """Временно отключить auto_now_add у Booking.booking_date, чтобы задать дату бронирования"""
+    field = Booking._meta.get_field('booking_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class SyntheticDataset:
+    """Параметры и генерация синтетического набора данных"""
+
+    def __init__(self, rooms=100, room_types=3, years=1.0, occupancy=0.7, seed=42,
+                 future_days=90, batch_size=5000):
+        if not 0 < occupancy < 1:
+            raise ValueError('Загрузка должна быть в интервале (0, 1)')
+        self.rooms = rooms
+        self.room_types = room_types
+        self.years = years
+        self.occupancy = occupancy
+        self.seed = seed
+        self.future_days = future_days
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.today = timezone.localdate()
+
+    def clear(self):
+        """Удалить бронирования, номера, цены и типы номеров"""
+        with transaction.atomic(), fts_suspended():
+            # Журнал ночей удаляется одним запросом, а не каскадом по каждому бронированию
+            RoomNight.objects.all().delete()
+            Booking.objects.all().delete()
+            Guest.objects.all().delete()
+            Room.objects.all().delete()
+            Price.objects.all().delete()
+            RoomType.objects.all().delete()
+
+    def create_reference_data(self):
+        """Создать типы номеров, их цены и номера; вернуть (номера, таблицы цен)"""
+        rng = self.random
+        room_types = RoomType.objects.bulk_create([
+            RoomType(name=f'Тип {i + 1}', description=f'Синтетический тип номера {i + 1}')
+            for i in range(self.room_types)
+        ])
+        tables = {}
+        prices = []
+        for index, room_type in enumerate(room_types):
+            base = 2000 + 1500 * index
+            rates = [Decimal(base + (300 if day in (4, 5, 6) else 0) + rng.randrange(0, 500, 50))
+                     for day in range(7)]
+            tables[room_type.pk] = WeeklyPriceTable(rates)
+            prices.extend(Price(room_type=room_type, day_of_week=day, price=rate)
+                          for day, rate in enumerate(rates))
+        Price.objects.bulk_create(prices, batch_size=self.batch_size)
+
+        rooms = []
+        for i in range(self.rooms):
+            category, capacity = CATEGORIES[i % len(CATEGORIES)]
+            rooms.append(Room(
+                room_number=f'{i // 100 + 1}{i % 100:02d}',
+                room_type=room_types[i % len(room_types)],
+                category=category,
+                capacity=capacity,
+                has_baby_bed=rng.random() < 0.5,
+                is_available=True,
+                price_per_night=tables[room_types[i % len(room_types)].pk].rates[0],
+            ))
+        rooms = Room.objects.bulk_create(rooms, batch_size=self.batch_size)
+        return rooms, tables
+
+    def stays(self, start, end):
+        """Периоды проживания одного номера: (заезд, выезд) с заданной средней загрузкой"""
+        rng = self.random
+        mean_stay = 3.5
+        mean_gap = mean_stay * (1 - self.occupancy) / self.occupancy
+        current = start + timedelta(days=round(rng.expovariate(1 / mean_gap)))
+        while current < end:
+            nights = max(1, min(21, round(rng.expovariate(1 / mean_stay))))
+            check_out = current + timedelta(days=nights)
+            yield current, check_out
+            current = check_out + timedelta(days=round(rng.expovariate(1 / mean_gap)))
+
+    def status_for(self, check_in, check_out):
+        """Статус бронирования в зависимости от положения периода относительно сегодня"""
+        rng = self.random
+        if check_out <= self.today:
+            return 'cancelled' if rng.random() < 0.05 else 'checked_out'
+        if check_in <= self.today:
+            return 'checked_in'
+        return 'confirmed' if rng.random() < 0.7 else 'pending'
+
+    def create_bookings(self, rooms, tables, progress=None):
+        """Создать историю бронирований пачками; вернуть количество бронирований"""
+        rng = self.random
+        start = self.today - timedelta(days=int(self.years * 365))
+        end = self.today + timedelta(days=self.future_days)
+        tz = timezone.get_current_timezone()
+        batch = []
+        total = 0
+
+        with explicit_booking_date():
+            for room in rooms:
+                table = tables[room.room_type_id]
+                for check_in, check_out in self.stays(start, end):
+                    status = self.status_for(check_in, check_out)
+                    booked_at = datetime.combine(
+                        check_in - timedelta(days=rng.randint(0, 60)),
+                        time(rng.randint(8, 21), rng.randint(0, 59), rng.randint(0, 59)),
+                    ).replace(tzinfo=tz)
+                    check_in_at = datetime.combine(check_in, time(14)).replace(tzinfo=tz)
+                    check_out_at = datetime.combine(check_out, time(12)).replace(tzinfo=tz)
+                    # bulk_create не отправляет pre_save: столбцы поиска заполняются здесь
+                    batch.append(fill_search_keys(Booking(
+                        customer_name=f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}',
+                        customer_phone=f'+7(9{rng.randint(0, 99):02d}){rng.randint(0, 999):03d}-'
+                                       f'{rng.randint(0, 99):02d}-{rng.randint(0, 99):02d}',
+                        room_id=room.pk,
+                        check_in_date=check_in,
+                        check_out_date=check_out,
+                        booking_date=booked_at,
+                        status=status,
+                        actual_check_in_date=check_in_at if status in ('checked_in', 'checked_out') else None,
+                        actual_check_out_date=check_out_at if status == 'checked_out' else None,
+                        total_price=table.stay_price(check_in, check_out),
+                    )))
+                    if len(batch) >= self.batch_size:
+                        Booking.objects.bulk_create(batch)
+                        total += len(batch)
+                        batch = []
+                        if progress:
+                            progress(total)
+            if batch:
+                Booking.objects.bulk_create(batch)
+                total += len(batch)
+                if progress:
+                    progress(total)
+
+        # Номера с заселенными гостями заняты
+        Room.objects.filter(
+            Exists(Booking.objects.filter(room=OuterRef('pk'), status='checked_in'))
+        ).update(is_available=False)
+        return total
+
+    def generate(self, progress=None):
+        """Создать полный набор данных; вернуть сводку"""
+        with transaction.atomic():
+            rooms, tables = self.create_reference_data()
+            # Полнотекстовый индекс имен строится один раз после загрузки
+            with fts_suspended():
+                bookings = self.create_bookings(rooms, tables, progress)
+            # bulk_create и update() не отправляют сигналы: обновить производные данные вручную
+            rebuild_counters()
+            nights = rebuild_ledger(batch_size=self.batch_size)[1]
+            guests = backfill_guests(batch_size=self.batch_size)[1]
+            bump_version(REFERENCE)
+            bump_version(ROOM_STATUS)
+        reference_cache.invalidate()
+        return {
+            'room_types': self.room_types,
+            'rooms': len(rooms),
+            'bookings': bookings,
+            'room_nights': nights,
+            'guests': guests,
+            'years': self.years,
+            'occupancy': self.occupancy,
+            'seed': self.seed,
+        }
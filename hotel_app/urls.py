@@ -1,15 +1,30 @@
+from django.conf import settings
 from django.urls import path
-from . import views
-
-urlpatterns = [
-    path('', views.home, name='home'),
-    path('rooms/', views.room_management, name='room_management'),
-    path('room-status/', views.room_status, name='room_status'),
-    path('bookings/', views.booking_list, name='booking_list'),
-    path('bookings/cancel/<int:booking_id>/', views.cancel_booking, name='cancel_booking'),
-    path('check-in-out/', views.check_in_out, name='check_in_out'),
-    path('check-in-guest/', views.check_in_guest, name='check_in_guest'),
-    path('pricing/', views.pricing_info, name='pricing_info'),
-    path('test/', views.test_view, name='test_view'),
-    path('test-static/', views.test_static, name='test_static'),
-]
\ No newline at end of file
+from . import async_views, views
+
+
+def app_urlpatterns(asynchronous=False):
+    """Маршруты приложения; asynchronous - асинхронные версии представлений чтения"""
+    read_views = async_views if asynchronous else views
+    return [
+        path('', views.home, name='home'),
+        path('rooms/', read_views.room_management, name='room_management'),
+        path('room-status/', read_views.room_status, name='room_status'),
+        path('room-status/stream/', views.room_status_stream, name='room_status_stream'),
+        path('bookings/', read_views.booking_list, name='booking_list'),
+        path('bookings/export/', read_views.export_bookings, name='export_bookings'),
+        path('bookings/search/', views.search_bookings, name='search_bookings'),
+        path('guests/<int:guest_id>/', views.guest_detail, name='guest_detail'),
+        path('bookings/cancel/<int:booking_id>/', views.cancel_booking, name='cancel_booking'),
+        path('check-in-out/', views.check_in_out, name='check_in_out'),
+        path('bookings/batch/<str:action>/', views.batch_bookings, name='batch_bookings'),
+        path('check-in-guest/', views.check_in_guest, name='check_in_guest'),
+        path('pricing/', read_views.pricing_info, name='pricing_info'),
+        path('api/rooms/status', views.api_room_status, name='api_room_status'),
+        path('cache-stats/', views.cache_stats, name='cache_stats'),
+        path('test/', views.test_view, name='test_view'),
+        path('test-static/', views.test_static, name='test_static'),
+    ]
+
+
+urlpatterns = app_urlpatterns(settings.HOTEL_ASYNC_VIEWS)
@@ -0,0 +1,37 @@
+"""Счетчики версий данных, хранящиеся в базе данных.
+
+Версия увеличивается при каждой записи в отслеживаемые таблицы, поэтому
+несколько рабочих процессов могут проверять актуальность своих кэшей
+одним запросом по первичному ключу без внешнего сервера кэша.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import DataVersion
+
+# Справочные данные: типы номеров, цены и каталог номеров
+REFERENCE = 'reference'
+# Состояние номеров: любые записи в Room и Booking
+ROOM_STATUS = 'room_status'
+
+
+def bump_version(key):
+    """Увеличить версию key; строка счетчика создается при первом вызове"""
+    updated = DataVersion.objects.filter(key=key).update(version=F('version') + 1)
+    if not updated:
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(key=key, version=1)
+        except IntegrityError:
+            DataVersion.objects.filter(key=key).update(version=F('version') + 1)
+
+
+def current_version(key):
+    """Текущая версия key (0, если записей еще не было)"""
+    return DataVersion.objects.filter(key=key).values_list('version', flat=True).first() or 0
+
+
+def version_stamp(*keys):
+    """Общая метка версий нескольких ключей одним запросом, например "3.17" """
+    stored = dict(DataVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+    return '.'.join(str(stored.get(key, 0)) for key in keys)
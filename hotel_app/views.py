@@ -1,103 +1,213 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.utils import timezone
-from django.http import HttpResponse
-from .models import Room, RoomType, Booking, Price
-from .forms import CheckInForm
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.functional import SimpleLazyObject
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import condition, require_GET, require_POST
+from .models import Room, RoomType, Booking, Price, Guest
+from .forms import BookingFilterForm, CheckInForm
+from .pricing import quote, stay_price
+from .pagination import KeysetPage
+from .export import EXPORT_CHUNK_SIZE, export_chunks, export_response, parse_export_params
+from .live import room_status_events, room_status_poll
+from .versioning import REFERENCE, ROOM_STATUS, bump_version, version_stamp
+from .occupancy import occupancy_counts, set_room_availability
+from .reference_cache import reference_cache, reference_data
+from .holds import new_hold_token, place_hold, release_holds
+from .frontdesk import INVALID_STATUS, MAX_BATCH_SIZE, NOT_DUE, TRANSITIONS, batch_transition
+from .search import MAX_SEARCH_LIMIT, SEARCH_LIMIT, search_guests
+from .guests import guest_history, guest_summary
+from .allocation import (
+    NoRoomAvailable, active_bookings as active_bookings_query, claim_room, find_available_room, occupied_on,
+    occupies_on,
+)
 from datetime import date
+from decimal import Decimal
+import json
+import logging
 
-def update_room_availability(room):
+logger = logging.getLogger(__name__)
+
+# Количество бронирований на странице списка
+BOOKING_PAGE_SIZE = 50
+# Количество последних выездов на странице заезда/выезда
+RECENT_CHECK_OUTS = 50
+
+def update_room_availability(room, booking=None):
     """Обновить статус доступности комнаты"""
+    log_fields = {
+        'room_id': room.pk,
+        'room_number': room.room_number,
+        'booking_id': booking.pk if booking is not None else None,
+    }
     try:
-        # Проверить, есть ли активные бронирования (не отмененные и не выселенные) для этой комнаты
-        active_bookings = Booking.objects.filter(
-            room=room
-        ).exclude(
-            status__in=['cancelled', 'checked_out']
-        )
-        
+        # Проверить, есть ли активные бронирования (не отмененные и не выселенные),
+        # занимающие комнату сегодня; будущие бронирования номер не занимают
+        active_bookings = active_bookings_query().filter(occupied_on(), room=room)
+
         # 如果没有 активных бронирований, номер должен быть доступен
-        should_be_available = not active_bookings.exists()
-        
-        # 打印调试信息
-        print(f"DEBUG: 房间 {room.room_number} 的状态检查:")
-        print(f"DEBUG: 活跃预订数量: {active_bookings.count()}")
-        print(f"DEBUG: 房间当前状态: {'可用' if room.is_available else '占用'}")
-        print(f"DEBUG: 房间应该状态: {'可用' if should_be_available else '占用'}")
+        # Количество бронирований считается только при включенном уровне DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            active_count = active_bookings.count()
+            should_be_available = active_count == 0
+            logger.debug(
+                'Проверка статуса комнаты %s: активных бронирований %d, доступна %s, должна быть доступна %s',
+                room.room_number, active_count, room.is_available, should_be_available,
+                extra=log_fields,
+            )
+        else:
+            should_be_available = not active_bookings.exists()
         
-        # Обновить статус комнаты только если он изменился
-        if room.is_available != should_be_available:
-            room.is_available = should_be_available
-            room.save()
-            print(f"Комната {room.room_number} теперь {'доступна' if should_be_available else 'занята'}")
-            # 添加成功更新的调试信息
-            print(f"DEBUG: 房间 {room.room_number} 状态已更新")
+        # Флаг в памяти мог устареть: условный UPDATE сверяется со значением в базе
+        if set_room_availability(room, should_be_available):
+            bump_version(ROOM_STATUS)
+            logger.info(
+                'Комната %s теперь %s', room.room_number,
+                'доступна' if should_be_available else 'занята',
+                extra=log_fields,
+            )
         else:
-            print(f"DEBUG: 房间 {room.room_number} 状态无需更新")
-    except Exception as e:
-        print(f"Ошибка при обновлении статуса комнаты {room.room_number}: {e}")
+            logger.debug('Статус комнаты %s не изменился', room.room_number, extra=log_fields)
+    except Exception:
+        logger.exception('Ошибка при обновлении статуса комнаты %s', room.room_number, extra=log_fields)
+
+def room_status_rows():
+    """Строки страницы статуса номеров (два запроса); ошибки базы данных не перехватываются"""
+    # Все комнаты с типом номера (JOIN) и активными бронированиями (один
+    # дополнительный запрос) - число запросов не зависит от количества комнат
+    rooms = Room.objects.select_related('room_type').prefetch_related(
+        Prefetch(
+            'booking_set',
+            queryset=active_bookings_query().order_by('check_in_date', 'id'),
+            to_attr='active_booking_list',
+        )
+    ).order_by('room_number')
+    room_status_info = []
+    today = timezone.localdate()
+    
+    for room in rooms:
+        room_status_info.append({
+            'room': room,
+            # Занятость на сегодня по уже загруженным бронированиям, а не по флагу is_available
+            'is_occupied': any(occupies_on(booking, today) for booking in room.active_booking_list),
+            'active_bookings': room.active_booking_list
+        })
+    
+    return room_status_info
 
 def get_room_status_info():
     """Получить комнаты статус информацию"""
     try:
-        # Получить все комнаты их статус
-        rooms = Room.objects.all().order_by('room_number')
-        room_status_info = []
-        
-        for room in rooms:
-            # Получить все бронирования для этой комнаты
-            bookings = Booking.objects.filter(room=room)
-            # Получить бронирования которые не отменены и не выселены
-            active_bookings = bookings.exclude(status__in=['cancelled', 'checked_out'])
-            
-            room_status_info.append({
-                'room': room,
-                'is_occupied': not room.is_available,
-                'active_bookings': active_bookings
-            })
-        
-        return room_status_info
+        return room_status_rows()
     except Exception as e:
-        print(f"Ошибка при получении информации о статусе комнат: {e}")
+        logger.exception('Ошибка при получении информации о статусе комнат')
         return []
 
+def room_management_rows(room_types, counts):
+    """Строки панели управления номерами: тип номера и количество номеров"""
+    room_info = []
+    for room_type in room_types:
+        total_rooms, available_rooms = counts.get(room_type.id, (0, 0))
+        occupied_rooms = total_rooms - available_rooms
+        room_info.append({
+            'type': room_type,
+            'total': total_rooms,
+            'available': available_rooms,
+            'occupied': occupied_rooms
+        })
+    return room_info
+
 def room_management(request):
     """Room management view"""
     try:
         # Get all room types and their available counts
-        room_types = RoomType.objects.all()
-        room_info = []
-        
-        for room_type in room_types:
-            total_rooms = Room.objects.filter(room_type=room_type).count()
-            available_rooms = Room.objects.filter(room_type=room_type, is_available=True).count()
-            occupied_rooms = total_rooms - available_rooms
-            room_info.append({
-                'type': room_type,
-                'total': total_rooms,
-                'available': available_rooms,
-                'occupied': occupied_rooms
-            })
-        
+        # Типы номеров берутся из кэша справочных данных, количество номеров -
+        # одним групповым запросом или из денормализованных счетчиков
         context = {
-            'room_info': room_info
+            'room_info': room_management_rows(reference_data().room_types, occupancy_counts())
         }
         return render(request, 'hotel_app/room_management.html', context)
     except Exception as e:
         messages.error(request, f'Ошибка при загрузке данных: {e}')
         return render(request, 'hotel_app/room_management.html', {'room_info': []})
 
+def filtered_bookings(request):
+    """Форма фильтров списка бронирований и отфильтрованный queryset"""
+    # Номер и тип номера загружаются в том же запросе (JOIN)
+    bookings = Booking.objects.select_related('room__room_type')
+    filter_form = BookingFilterForm(request.GET or None)
+    if filter_form.is_valid():
+        bookings = filter_form.filter(bookings)
+    return filter_form, bookings
+
+def booking_list_context(request, filter_form, page):
+    """Контекст шаблона списка бронирований"""
+    # Параметры фильтров для ссылок на соседние страницы
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    
+    return {
+        'bookings': page,
+        'page': page,
+        'filter_form': filter_form if filter_form.is_bound else BookingFilterForm(),
+        'filter_query': query.urlencode()
+    }
+
 def booking_list(request):
     """Booking list view"""
     try:
-        bookings = Booking.objects.all().order_by('-booking_date')
-        context = {
-            'bookings': bookings
-        }
+        filter_form, bookings = filtered_bookings(request)
+        
+        # Постраничный вывод по ключу (booking_date, id) вместо OFFSET;
+        # страница читается только при отсутствии фрагмента таблицы в кэше
+        page = SimpleLazyObject(lambda: KeysetPage(
+            bookings,
+            BOOKING_PAGE_SIZE,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        ))
+        context = booking_list_context(request, filter_form, page)
+        context['data_version'] = version_stamp(REFERENCE, ROOM_STATUS)
         return render(request, 'hotel_app/booking_list.html', context)
     except Exception as e:
         messages.error(request, f'Ошибка при загрузке бронирований: {e}')
-        return render(request, 'hotel_app/booking_list.html', {'bookings': []})
+        return render(request, 'hotel_app/booking_list.html', {'bookings': [], 'filter_form': BookingFilterForm()})
+
+@require_GET
+def export_bookings(request):
+    """Выгрузка бронирований в CSV или NDJSON (?format=) с фильтрами списка бронирований"""
+    try:
+        export_format, rows = parse_export_params(request.GET)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    # Строки читаются по мере отправки ответа, без загрузки всей выборки в память
+    return export_response(export_format, export_chunks(export_format, rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)))
+
+@require_GET
+def search_bookings(request):
+    """Подсказки поиска гостя (?q=): начало телефона или слов имени, JSON"""
+    query = request.GET.get('q', '')
+    try:
+        limit = min(int(request.GET.get('limit', SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+    except ValueError:
+        return HttpResponseBadRequest('limit должен быть целым числом')
+    results = search_guests(query, max(limit, 1))
+    return JsonResponse({'query': query, 'results': results}, json_dumps_params={'ensure_ascii': False})
+
+def guest_detail(request, guest_id):
+    """Профиль гостя: контакты, сумма бронирований и история"""
+    guest = get_object_or_404(Guest, id=guest_id)
+    context = {
+        'guest': guest,
+        'summary': guest_summary(guest),
+        'bookings': guest_history(guest),
+    }
+    return render(request, 'hotel_app/guest_detail.html', context)
 
 def cancel_booking(request, booking_id):
     """Cancel booking view"""
@@ -106,11 +216,13 @@ def cancel_booking(request, booking_id):
         if request.method == 'POST':
             old_status = booking.status
             booking.status = 'cancelled'
-            booking.save()
+            # Ночи бронирования снимаются с журнала в той же транзакции (signals)
+            with transaction.atomic():
+                booking.save()
             
             # Обновить комнату как доступную
             try:
-                update_room_availability(booking.room)
+                update_room_availability(booking.room, booking)
             except Exception as e:
                 messages.error(request, f'Ошибка при обновлении статуса комнаты: {e}')
             
@@ -141,15 +253,17 @@ def check_in_out(request):
             elif action == 'check_out':
                 booking.status = 'checked_out'
                 booking.actual_check_out_date = timezone.now()
-                
-                # Обновить комнату как доступную
+                messages.success(request, 'Регистрация выезда прошла успешно')
+            # Журнал проданных ночей обновляется в той же транзакции (signals)
+            with transaction.atomic():
+                booking.save()
+            
+            # Обновить статус комнаты после сохранения нового статуса бронирования
+            if action in ('check_in', 'check_out'):
                 try:
-                    update_room_availability(booking.room)
+                    update_room_availability(booking.room, booking)
                 except Exception as e:
                     messages.error(request, f'Ошибка при обновлении статуса комнаты: {e}')
-                
-                messages.success(request, 'Регистрация выезда прошла успешно')
-            booking.save()
             # Определить цель перенаправления на основе параметра redirect_to
             if action == 'check_out':
                 if redirect_to == 'room_status':
@@ -161,36 +275,113 @@ def check_in_out(request):
                     return redirect('check_in_out')
             return redirect('check_in_out')
         
-        # Получить все записи о заезде и выезде
-        check_in_bookings = Booking.objects.filter(status='checked_in')
-        check_out_bookings = Booking.objects.filter(status='checked_out')
+        # Номер и тип номера загружаются в том же запросе (JOIN); из истории
+        # выездов показываются только последние записи
+        today = timezone.localdate()
+        bookings = Booking.objects.select_related('room__room_type')
+        arrival_bookings = bookings.filter(
+            status__in=TRANSITIONS['check_in'].allowed_from,
+            check_in_date__lte=today,
+            check_out_date__gt=today,
+        ).order_by('check_in_date', 'room__room_number')
+        check_in_bookings = bookings.filter(status='checked_in').order_by('check_out_date', 'room__room_number')
+        check_out_bookings = bookings.filter(status='checked_out').order_by(
+            '-actual_check_out_date', '-id'
+        )[:RECENT_CHECK_OUTS]
         
         context = {
+            'arrival_bookings': arrival_bookings,
             'check_in_bookings': check_in_bookings,
-            'check_out_bookings': check_out_bookings
+            'check_out_bookings': check_out_bookings,
+            'recent_check_outs': RECENT_CHECK_OUTS
         }
         return render(request, 'hotel_app/check_in_out.html', context)
     except Exception as e:
         messages.error(request, f'Ошибка при обработке заезда/выезда: {e}')
         return render(request, 'hotel_app/check_in_out.html', {
+            'arrival_bookings': [],
             'check_in_bookings': [],
             'check_out_bookings': []
         })
 
+def batch_booking_ids(request):
+    """Идентификаторы бронирований пакета из JSON {"booking_ids": [...]} или полей формы booking_ids"""
+    if request.content_type == 'application/json':
+        try:
+            values = json.loads(request.body).get('booking_ids', [])
+        except (ValueError, AttributeError):
+            raise ValueError('Неверный JSON')
+    else:
+        values = request.POST.getlist('booking_ids')
+    if not isinstance(values, list):
+        raise ValueError('booking_ids должен быть списком')
+    try:
+        booking_ids = [int(value) for value in values]
+    except (TypeError, ValueError):
+        raise ValueError('booking_ids должен содержать номера бронирований')
+    if len(booking_ids) > MAX_BATCH_SIZE:
+        raise ValueError(f'В одном пакете не больше {MAX_BATCH_SIZE} бронирований')
+    return booking_ids
+
+@require_POST
+def batch_bookings(request, action):
+    """Пакетный заезд, выезд, отмена или отметка неявки (action: ключ TRANSITIONS) в одной транзакции.
+
+    Запрос JSON получает ответ JSON с итогом по каждому бронированию,
+    форма со страницы заезда/выезда - сообщения и перенаправление.
+    """
+    if action not in TRANSITIONS:
+        raise Http404('Неизвестная операция')
+    as_json = request.content_type == 'application/json'
+    try:
+        booking_ids = batch_booking_ids(request)
+    except ValueError as e:
+        if as_json:
+            return JsonResponse({'error': str(e)}, status=400)
+        messages.error(request, str(e))
+        return redirect('check_in_out')
+    
+    result = batch_transition(action, booking_ids)
+    if as_json:
+        return JsonResponse(result.as_dict(), json_dumps_params={'ensure_ascii': False})
+    
+    label = TRANSITIONS[action].label
+    if result.done:
+        messages.success(request, f'{label}: обработано бронирований {len(result.done)}')
+    elif not booking_ids:
+        messages.warning(request, 'Не выбрано ни одного бронирования')
+    statuses = dict(Booking.STATUS_CHOICES)
+    for item in result.skipped:
+        if item.outcome == INVALID_STATUS:
+            messages.warning(request, f'Бронирование {item.booking_id} пропущено: статус «{statuses.get(item.status, item.status)}»')
+        elif item.outcome == NOT_DUE:
+            messages.warning(request, f'Бронирование {item.booking_id} пропущено: дата заезда еще не наступила')
+        else:
+            messages.warning(request, f'Бронирование {item.booking_id} не найдено')
+    return redirect('check_in_out')
+
+def price_table_rows(data):
+    """Цены по типам номеров и дням недели: {название типа: {день: цена}}"""
+    day_names = dict(Price.DAY_CHOICES)
+    
+    # Организовать информацию о ценах по типам номеров
+    price_dict = {}
+    for room_type in data.room_types:
+        prices = data.prices.get(room_type.id)
+        if prices:
+            price_dict[room_type.name] = {
+                day_names[day_of_week]: float(price) for day_of_week, price in prices
+            }
+    return price_dict
+
 def pricing_info(request):
     """Pricing information view"""
     try:
-        prices = Price.objects.select_related('room_type').all()
-        
-        # Организовать информацию о ценах по типам номеров
-        price_dict = {}
-        for price in prices:
-            if price.room_type.name not in price_dict:
-                price_dict[price.room_type.name] = {}
-            price_dict[price.room_type.name][price.get_day_of_week_display()] = float(price.price)
-        
+        # Цены и типы номеров берутся из кэша справочных данных
+        data = reference_data()
         context = {
-            'price_dict': price_dict
+            'price_dict': price_table_rows(data),
+            'data_version': data.version
         }
         return render(request, 'hotel_app/pricing_info.html', context)
     except Exception as e:
@@ -226,23 +417,22 @@ def check_in_guest(request):
                     messages.error(request, 'Дата выезда должна быть позже даты заезда')
                     return render(request, 'hotel_app/check_in_guest.html', {'form': form})
                 
-                # Найти доступную комнату
+                # Найти комнату, свободную на все ночи периода проживания
                 try:
-                    # Сначала найти полностью соответствующую комнату
-                    available_room = Room.objects.filter(
-                        room_type=room_type,
-                        has_baby_bed=has_baby_bed,
-                        is_available=True
-                    ).first()
-                    
-                    # Если нет полностью соответствующей комнаты, найти комнату того же типа
-                    if not available_room:
-                        available_room = Room.objects.filter(
-                            room_type=room_type,
-                            is_available=True
-                        ).first()
-                    
+                    # Полностью соответствующие комнаты предлагаются первыми,
+                    # затем любые свободные комнаты того же типа
+                    hold_token = request.session.get('hold_token') or new_hold_token()
+                    available_room = find_available_room(
+                        room_type, check_in_date, check_out_date, has_baby_bed, hold_token=hold_token
+                    )
+
                     if available_room:
+                        # Удержать номер до подтверждения, чтобы его не предложили другим;
+                        # если его только что удержал другой администратор, удерживается соседний
+                        hold = place_hold(available_room, check_in_date, check_out_date, hold_token, has_baby_bed)
+                        available_room = hold.room
+                        request.session['hold_token'] = hold_token
+                        
                         # Расчет общей стоимости
                         total_price = calculate_total_price(available_room, check_in_date, check_out_date)
                         
@@ -256,9 +446,14 @@ def check_in_guest(request):
                             'check_in_date': check_in_date.isoformat(),
                             'check_out_date': check_out_date.isoformat(),
                             'room_id': available_room.id,
-                            'total_price': total_price
+                            'total_price': str(total_price)
                         }
                         
+                        # Стоимость того же периода для всех типов номеров
+                        room_types = reference_data().room_types
+                        quotes = quote(room_types, check_in_date, check_out_date)
+                        room_type_quotes = [(rt, quotes[rt.id]) for rt in room_types]
+                        
                         # Передать данные в шаблон для отображения цены
                         context = {
                             'form': form,
@@ -269,12 +464,17 @@ def check_in_guest(request):
                             'check_out_date': check_out_date,
                             'customer_name': customer_name,
                             'customer_phone': customer_phone,
-                            'customer_email': customer_email
+                            'customer_email': customer_email,
+                            'room_type_quotes': room_type_quotes,
+                            'hold_expires_at': timezone.localtime(hold.expires_at)
                         }
                         return render(request, 'hotel_app/check_in_guest.html', context)
                     else:
                         messages.error(request, 'Нет доступных номеров выбранного типа')
                         return render(request, 'hotel_app/check_in_guest.html', {'form': form})
+                except NoRoomAvailable as e:
+                    messages.error(request, str(e))
+                    return render(request, 'hotel_app/check_in_guest.html', {'form': form})
                 except Exception as e:
                     messages.error(request, f'Ошибка при расчете стоимости: {e}')
                     return render(request, 'hotel_app/check_in_guest.html', {'form': form})
@@ -292,32 +492,63 @@ def check_in_guest(request):
                 return render(request, 'hotel_app/check_in_guest.html', {'form': form})
             
             try:
-                # Получить объект комнаты
-                room = Room.objects.get(id=check_in_data['room_id'])
+                check_in_date = date.fromisoformat(check_in_data['check_in_date'])
+                check_out_date = date.fromisoformat(check_in_data['check_out_date'])
+                total_price = Decimal(check_in_data['total_price'])
                 
-                # Создать запись бронирования
-                booking = Booking.objects.create(
-                    customer_name=check_in_data['customer_name'],
-                    customer_phone=check_in_data['customer_phone'],
-                    room=room,
-                    check_in_date=date.fromisoformat(check_in_data['check_in_date']),
-                    check_out_date=date.fromisoformat(check_in_data['check_out_date']),
-                    status='checked_in',
-                    actual_check_in_date=timezone.now(),
-                    total_price=check_in_data['total_price']
-                )
+                # Между расчетом и подтверждением номер мог занять другой
+                # администратор: номер блокируется и проверяется заново,
+                # бронирование создается в той же транзакции
+                with transaction.atomic():
+                    room = claim_room(
+                        check_in_data['room_type_id'],
+                        check_in_date,
+                        check_out_date,
+                        check_in_data['has_baby_bed'],
+                        preferred_room_id=check_in_data['room_id'],
+                        hold_token=request.session.get('hold_token'),
+                    )
+                    if room.pk != check_in_data['room_id']:
+                        total_price = calculate_total_price(room, check_in_date, check_out_date)
+                        messages.warning(request, f'Выбранный номер уже занят, гостю назначен номер {room.room_number}')
+                    
+                    # Заселение - только в день заезда; будущее проживание
+                    # бронируется и не занимает номер до даты заезда
+                    arrives_today = check_in_date <= timezone.localdate()
+                    booking = Booking.objects.create(
+                        customer_name=check_in_data['customer_name'],
+                        customer_phone=check_in_data['customer_phone'],
+                        customer_email=check_in_data.get('customer_email', ''),
+                        room=room,
+                        check_in_date=check_in_date,
+                        check_out_date=check_out_date,
+                        status='checked_in' if arrives_today else 'confirmed',
+                        actual_check_in_date=timezone.now() if arrives_today else None,
+                        total_price=total_price
+                    )
+                    if request.session.get('hold_token'):
+                        release_holds(request.session['hold_token'])
                 
                 # Обновить статус комнаты на занятую
                 try:
-                    update_room_availability(room)
+                    update_room_availability(room, booking)
                 except Exception as e:
                     messages.error(request, f'Ошибка при обновлении статуса комнаты: {e}')
                 
                 # Очистить данные в session
                 del request.session['check_in_data']
                 
-                messages.success(request, f'Гость {check_in_data["customer_name"]} успешно зарегистрирован в номере {room.room_number}. Общая стоимость: {check_in_data["total_price"]} руб.')
+                if arrives_today:
+                    messages.success(request, f'Гость {check_in_data["customer_name"]} успешно зарегистрирован в номере {room.room_number}. Общая стоимость: {total_price} руб.')
+                else:
+                    messages.success(request, f'Для гостя {check_in_data["customer_name"]} забронирован номер {room.room_number} с {check_in_date:%d.%m.%Y}. Общая стоимость: {total_price} руб.')
                 return redirect('check_in_guest')
+            except NoRoomAvailable as e:
+                del request.session['check_in_data']
+                messages.error(request, f'{e}. Пожалуйста, начните заново.')
+                form = CheckInForm()
+                form.fields['room_type'].queryset = RoomType.objects.all()
+                return render(request, 'hotel_app/check_in_guest.html', {'form': form})
             except Exception as e:
                 messages.error(request, f'Ошибка при регистрации заезда: {e}')
                 form = CheckInForm()
@@ -333,49 +564,93 @@ def check_in_guest(request):
 def calculate_total_price(room, check_in_date, check_out_date):
     """Расчет общей стоимости"""
     try:
-        # Расчет количества ночей
-        days = (check_out_date - check_in_date).days
-        
-        if days <= 0:
-            return 0
-            
-        total_price = 0
-        current_date = check_in_date
-        
-        # Рассчитать цену за каждый день
-        while current_date < check_out_date:
-            # Получить день недели (0=Понедельник, 6=Воскресенье)
-            day_of_week = current_date.weekday()
-            
-            # Получить цену для типа номера и дня недели
-            try:
-                price = Price.objects.get(room_type=room.room_type, day_of_week=day_of_week)
-                total_price += float(price.price)
-            except Price.DoesNotExist:
-                # Если цена не установлена, использовать цену по умолчанию для номера
-                total_price += float(room.price_per_night)
-            
-            # Перейти к следующему дню
-            current_date = date.fromordinal(current_date.toordinal() + 1)
-        
-        return total_price
-    except Exception as e:
-        print(f"Ошибка при расчете стоимости: {e}")
-        return 0
+        # Таблица цен по дням недели загружается одним запросом,
+        # стоимость считается точно в Decimal без обхода по дням
+        return stay_price(room, check_in_date, check_out_date)
+    except Exception:
+        logger.exception('Ошибка при расчете стоимости', extra={'room_id': room.pk})
+        return Decimal('0.00')
 
 def room_status(request):
     """Room status view"""
     try:
-        # Получить информацию о статусе номеров
-        room_status_info = get_room_status_info()
+        # Таблица кэшируется по версии данных: номера и бронирования читаются
+        # только при отсутствии фрагмента в кэше (см. room_status.html)
         context = {
-            'room_status_info': room_status_info
+            'room_status_info': SimpleLazyObject(room_status_rows),
+            'data_version': version_stamp(REFERENCE, ROOM_STATUS)
         }
         return render(request, 'hotel_app/room_status.html', context)
     except Exception as e:
         messages.error(request, f'Ошибка при загрузке данных о номерах: {e}')
         return render(request, 'hotel_app/room_status.html', {'room_status_info': []})
 
+async def room_status_stream(request):
+    """Лента изменений статуса номеров (Server-Sent Events).
+
+    Через ASGI - долгий поток; под WSGI - короткий опрос, чтобы не держать
+    рабочий поток на все время подключения.
+    """
+    if not isinstance(request, ASGIRequest):
+        body = await sync_to_async(room_status_poll)(request.headers.get('Last-Event-ID'))
+        response = HttpResponse(body, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+    response = StreamingHttpResponse(room_status_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def room_status_etag(request):
+    """ETag статуса номеров из версий данных: один запрос по первичному ключу"""
+    # Метка сохраняется в запросе, чтобы представление не читало ее повторно
+    request.data_version = version_stamp(REFERENCE, ROOM_STATUS)
+    return f'"rooms-{request.data_version}"'
+
+def room_status_payload():
+    """Состояние номеров и активные бронирования в компактном виде (два запроса и кэш справочных данных)"""
+    bookings = {}
+    for row in active_bookings_query().order_by('check_in_date', 'id').values_list(
+        'id', 'room_id', 'customer_name', 'check_in_date', 'check_out_date', 'status'
+    ):
+        bookings.setdefault(row[1], []).append({
+            'id': row[0],
+            'customer_name': row[2],
+            'check_in_date': row[3].isoformat(),
+            'check_out_date': row[4].isoformat(),
+            'status': row[5],
+        })
+    
+    room_types = reference_data().room_types_by_id
+    rooms = []
+    for room_id, room_number, room_type_id, is_available in Room.objects.order_by(
+        'room_number'
+    ).values_list('id', 'room_number', 'room_type_id', 'is_available'):
+        room_type = room_types.get(room_type_id)
+        rooms.append({
+            'id': room_id,
+            'room_number': room_number,
+            'room_type': room_type.name if room_type else None,
+            'is_available': is_available,
+            'active_bookings': bookings.get(room_id, []),
+        })
+    return rooms
+
+@require_GET
+@condition(etag_func=room_status_etag)
+def api_room_status(request):
+    """JSON статуса номеров; неизменившиеся данные возвращают 304 по If-None-Match"""
+    stamp = request.data_version
+    response = JsonResponse({'version': stamp, 'rooms': room_status_payload()},
+                            json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')})
+    response['X-Data-Version'] = stamp
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+def cache_stats(request):
+    """Счетчики кэша справочных данных текущего процесса"""
+    return JsonResponse(reference_cache.stats())
+
 def home(request):
     """Home page view"""
     return render(request, 'hotel_app/home.html')
\ No newline at end of file
@@ -3,6 +3,17 @@ ASGI config for hotel_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Async views such as the room status change feed (/room-status/stream/)
+stream without holding a worker thread when served through this entry
+point, e.g. ``uvicorn hotel_project.asgi:application``. The read-only
+pages are switched to their async versions (HOTEL_ASYNC_VIEWS) unless the
+environment says otherwise.
+
+Persistent database connections are disabled here (HOTEL_DB_CONN_MAX_AGE=0):
+async views run their queries in executor threads that outlive the request,
+so a connection kept open between requests would never be closed by the
+request cleanup.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -12,5 +23,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hotel_project.settings')
+os.environ.setdefault('HOTEL_ASYNC_VIEWS', '1')
+os.environ.setdefault('HOTEL_DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
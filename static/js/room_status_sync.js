@@ -17,32 +17,97 @@ document.addEventListener('DOMContentLoaded', function() {
 
 // Запустить проверку синхронизации статуса
 function startStatusSync() {
-    // Проверять статус номеров каждые 10 секунд
-    setInterval(function() {
-        checkRoomStatusUpdates();
-    }, 10000);
+    // Подписаться на ленту изменений статуса номеров (Server-Sent Events);
+    // сервер присылает только изменившиеся строки, без перерисовки страницы.
+    // Под WSGI сервер закрывает ответ после снимка, и EventSource сам
+    // повторяет запрос через заданный сервером интервал (короткий опрос)
+    if (!window.EventSource) {
+        return;
+    }
+    
+    const source = new EventSource('/room-status/stream/');
+    let initialized = false;
+    
+    // Полный снимок приходит при (пере)подключении, если статус номеров изменился
+    source.addEventListener('snapshot', function(event) {
+        const data = JSON.parse(event.data);
+        const changed = applyRoomStatusChanges(data.rooms, []);
+        if (initialized && changed > 0) {
+            notifyRoomStatusChanged(changed);
+        }
+        initialized = true;
+    });
+    
+    // Дальше приходят только изменения
+    source.addEventListener('rooms', function(event) {
+        const data = JSON.parse(event.data);
+        applyRoomStatusChanges(data.changed, data.removed);
+        notifyRoomStatusChanged(data.changed.length + data.removed.length);
+    });
 }
 
-// Проверить обновления статуса номеров
-function checkRoomStatusUpdates() {
-    // Создать скрытый iframe для проверки статуса
-    const iframe = document.createElement('iframe');
-    iframe.style.display = 'none';
-    iframe.src = '/room-status/';
+// Обновить строки таблицы статуса номеров; вернуть количество измененных строк
+function applyRoomStatusChanges(rooms, removed) {
+    const table = document.getElementById('room-status-table');
+    if (!table) {
+        return 0;
+    }
     
-    // После загрузки iframe проверить наличие обновлений
-    iframe.onload = function() {
-        // Здесь можно добавить более сложную логику сравнения статусов
-        // Сейчас мы просто перезагружаем страницу для получения актуального статуса
-        console.log('Проверка обновлений статуса номеров...');
-    };
+    let changed = 0;
+    rooms.forEach(function(room) {
+        const row = table.querySelector('tr[data-room-id="' + room.id + '"]');
+        if (!row) {
+            return;
+        }
+        
+        const statusCell = row.querySelector('[data-field="status"]');
+        const guestsCell = row.querySelector('[data-field="guests"]');
+        const statusKey = room.is_available ? 'available' : 'occupied';
+        const guestsKey = room.guests.join('\n');
+        if (row.dataset.status === statusKey && row.dataset.guests === guestsKey) {
+            return;
+        }
+        
+        statusCell.innerHTML = room.is_available
+            ? '<span class="badge bg-success">Доступен</span>'
+            : '<span class="badge bg-danger">Занят</span>';
+        
+        guestsCell.textContent = '';
+        if (room.guests.length > 0) {
+            room.guests.forEach(function(name) {
+                guestsCell.appendChild(document.createTextNode(name));
+                guestsCell.appendChild(document.createElement('br'));
+            });
+        } else {
+            const empty = document.createElement('span');
+            empty.className = 'text-muted';
+            empty.textContent = 'Нет гостей';
+            guestsCell.appendChild(empty);
+        }
+        
+        if (row.dataset.status !== undefined) {
+            changed++;
+        }
+        row.dataset.status = statusKey;
+        row.dataset.guests = guestsKey;
+    });
     
-    document.body.appendChild(iframe);
+    removed.forEach(function(roomId) {
+        const row = table.querySelector('tr[data-room-id="' + roomId + '"]');
+        if (row) {
+            row.parentNode.removeChild(row);
+            changed++;
+        }
+    });
     
-    // Удалить iframe через 5 секунд
-    setTimeout(function() {
-        document.body.removeChild(iframe);
-    }, 5000);
+    return changed;
+}
+
+// Сообщить об изменениях на страницах без таблицы статуса номеров
+function notifyRoomStatusChanged(count) {
+    if (count > 0 && !document.getElementById('room-status-table')) {
+        showRoomStatusNotification('Статус номеров изменился. Обновите страницу для просмотра актуальных данных.');
+    }
 }
 
 // Показать уведомление об обновлении статуса номеров